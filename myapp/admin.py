@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Participant, CleanupEvent, CleanupRegistration, Activity
+from .models import Participant, CleanupEvent, CleanupRegistration, Activity, Job, Notification
 
 @admin.register(Participant)
 class ParticipantAdmin(admin.ModelAdmin):
@@ -10,7 +10,7 @@ class ParticipantAdmin(admin.ModelAdmin):
 
 @admin.register(CleanupEvent)
 class CleanupEventAdmin(admin.ModelAdmin):
-    list_display = ("name", "place", "specific_location", "date", "start_time", "duration", "points", "is_active")
+    list_display = ("name", "place", "specific_location", "date", "start_time", "duration", "points", "registered_count", "is_active")
     list_filter = ("place", "date", "is_active")
     search_fields = ("title", "specific_location")
 
@@ -24,6 +24,20 @@ class CleanupRegistrationAdmin(admin.ModelAdmin):
 
 @admin.register(Activity)
 class ActivityAdmin(admin.ModelAdmin):
-    list_display = ("participant", "cleanup_type", "points_earned", "date_participated")
+    list_display = ("participant", "cleanup_type", "points_earned", "balance_after", "date_participated")
     list_filter = ("cleanup_type",)
     search_fields = ("participant__name",)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "max_attempts", "run_at", "locked_by", "finished_at")
+    list_filter = ("status", "name")
+    readonly_fields = ("locked_by", "locked_until", "last_error", "created_at", "finished_at")
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("participant", "kind", "event", "created_at", "read_at")
+    list_filter = ("kind",)
+    raw_id_fields = ("participant", "event")
@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .leaderboard import record_activities
+from .models import Activity, CleanupRegistration, Participant
+from .participants import forget_participants
+from .points import refresh_points_summaries
+from .registration import adjust_event_counts
+
+
+@dataclass
+class ApprovalResult:
+    selected: int = 0
+    newly_attended: int = 0
+    newly_approved: int = 0
+    awarded: int = 0
+
+
+def _lock(event, registration_ids):
+    return list(
+        CleanupRegistration.objects.select_for_update()
+        .filter(event=event, pk__in=registration_ids)
+        .values_list('pk', 'participant_id', 'attended', 'approved', 'points_awarded')
+    )
+
+
+def mark_attended(event, registration_ids):
+    """Flag the selected registrations of ``event`` as attended; safe to repeat."""
+    with transaction.atomic():
+        rows = _lock(event, registration_ids)
+        newly = [row for row in rows if not row[2]]
+        result = ApprovalResult(selected=len(rows), newly_attended=len(newly))
+        if newly:
+            CleanupRegistration.objects.filter(pk__in=[row[0] for row in newly]).update(attended=True)
+            adjust_event_counts(event.pk, attended=len(newly))
+            refresh_points_summaries({row[1] for row in newly})
+    return result
+
+
+def approve_registrations(event, registration_ids, approved_by=None):
+    """
+    Mark the selected registrations of ``event`` attended and approved, and
+    award ``event.points`` to every one that has not been awarded yet.
+
+    Everything happens in one transaction with a fixed number of statements:
+    two registration UPDATEs, one ``points = points + n`` UPDATE for all the
+    volunteers, one read of their new balances, one bulk insert into the
+    ledger, and set-based leaderboard, summary and counter updates. Rows that
+    were already awarded are left alone, so re-running the same selection is
+    a no-op.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = _lock(event, registration_ids)
+        result = ApprovalResult(selected=len(rows))
+        if not rows:
+            return result
+
+        pks = [row[0] for row in rows]
+        newly_attended = [row for row in rows if not row[2]]
+        newly_approved = [row[0] for row in rows if not row[3]]
+        to_award = [row for row in rows if not row[4]]
+        result.newly_attended = len(newly_attended)
+        result.newly_approved = len(newly_approved)
+        result.awarded = len(to_award)
+
+        if newly_approved:
+            CleanupRegistration.objects.filter(pk__in=newly_approved).update(
+                approved=True, approved_at=now, approved_by=approved_by,
+            )
+        CleanupRegistration.objects.filter(pk__in=pks).update(attended=True, points_awarded=True)
+
+        if to_award:
+            participant_ids = [row[1] for row in to_award]
+            Participant.objects.filter(pk__in=participant_ids).update(points=F('points') + event.points)
+            # The UPDATE holds the row locks until commit, so these are our own balances.
+            balances = dict(Participant.objects.filter(pk__in=participant_ids).values_list('pk', 'points'))
+            entries = Activity.objects.bulk_create([
+                Activity(
+                    participant_id=participant_id,
+                    event=event,
+                    cleanup_type=event.place,
+                    points_earned=event.points,
+                    description='Cleanup points',
+                    balance_after=balances[participant_id],
+                    awarded_by=approved_by,
+                )
+                for participant_id in participant_ids
+            ])
+            record_activities(entries)
+            forget_participants(participant_ids)
+
+        if newly_attended:
+            adjust_event_counts(event.pk, attended=len(newly_attended))
+        refresh_points_summaries({row[1] for row in rows})
+    return result
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+
+from .models import Participant
+from .participants import CACHED_FIELDS
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+class AccountBackend(ModelBackend):
+    """
+    One login form for volunteers and admins, one password hash per attempt.
+
+    ``authenticate(request, identifier=..., password=...)`` routes the
+    identifier to a single account type with an indexed lookup: anything with
+    an ``@`` is a volunteer email, anything else a staff username. The other
+    table is only consulted when the first has no match. Unknown identifiers
+    still pay for one hash so response times do not reveal which accounts
+    exist. Returns a ``Participant`` or a staff ``User``; hashes made with
+    outdated hasher settings are re-encoded on a successful check.
+
+    Admin sessions keep working through the inherited ``get_user()``.
+    """
+
+    def authenticate(self, request, identifier=None, password=None, **kwargs):
+        if not identifier or password is None:
+            return None
+        identifier = identifier.strip()
+
+        if '@' in identifier:
+            lookups = (self._participant, self._staff_user)
+        else:
+            lookups = (self._staff_user, self._participant)
+        for lookup in lookups:
+            account = lookup(identifier)
+            if account is not None:
+                return account if self._check(account, password) else None
+
+        make_password(password)
+        return None
+
+    def _participant(self, identifier):
+        if '@' not in identifier:
+            return None
+        return (
+            Participant.objects.only('password', *CACHED_FIELDS)
+            .filter(email=normalize_email(identifier)).first()
+        )
+
+    def _staff_user(self, identifier):
+        UserModel = get_user_model()
+        user = UserModel._default_manager.filter(**{UserModel.USERNAME_FIELD: identifier}).first()
+        if user is None or not user.is_staff or not self.user_can_authenticate(user):
+            return None
+        return user
+
+    def _check(self, account, password):
+        if not isinstance(account, Participant):
+            # User.check_password() already upgrades the stored hash.
+            return account.check_password(password)
+
+        def upgrade(raw_password):
+            account.set_password(raw_password)
+            Participant.objects.filter(pk=account.pk).update(password=account.password)
+
+        return check_password(password, account.password, setter=upgrade)
@@ -0,0 +1,162 @@
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment
+
+from .models import CleanupEvent, Participant
+from .participants import SESSION_KEY as PARTICIPANT_SESSION_KEY
+from .seeding import seed_dataset
+
+APP_TABLE = re.compile(r'\bmyapp_\w+')
+# Any "SCAN <name>" walks a whole table or alias (U0, e, ...), including
+# "SCAN t USING INDEX ..." which only reads it in index order; SEARCH is a
+# lookup, and so is an FTS MATCH ("SCAN t VIRTUAL TABLE INDEX 0:M...").
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (\w+)\b(?! VIRTUAL TABLE INDEX \d+:M)')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+# Catalog lookups and derived tables built by our own queries.
+IGNORED_TABLES = {'sqlite_master', 'ranked'}
+
+# (view label, table) pairs that are allowed to read a whole table.
+ALLOWED_SCANS = {
+    # Unfiltered admin lists walk the ordering index and stop after one page.
+    ('custom_admin_panel', 'myapp_cleanupevent'),
+    ('custom_admin_panel', 'myapp_participant'),
+    ('custom_admin_panel (place)', 'myapp_participant'),
+    ('custom_admin_panel (search)', 'myapp_cleanupevent'),
+    # fullname__icontains cannot use an index; it reads participants in
+    # registration order until a page of matches is found.
+    ('custom_admin_panel (search)', 'myapp_participant'),
+}
+
+
+def hot_requests(event_id):
+    """(label, url, who) for every hot view; ``who`` is 'admin', 'volunteer' or None."""
+    return [
+        ('select_event', '/select-event/', 'volunteer'),
+        ('event_list', '/event-history/', None),
+        ('previous_events_list', '/previous-events/', None),
+        ('previous_events_list (search)', '/previous-events/?q=beach+manila', None),
+        ('points_history', '/points-history/', 'volunteer'),
+        ('combined_list', '/combined-history/', 'volunteer'),
+        ('custom_admin_panel', '/custom-admin/', 'admin'),
+        ('custom_admin_panel (place)', '/custom-admin/?event_place=river&event_sort=date_asc', 'admin'),
+        ('custom_admin_panel (search)', '/custom-admin/?participant_q=santos', 'admin'),
+        ('event_participants', f'/custom-admin/event-participants/{event_id}/', 'admin'),
+    ]
+
+
+@contextmanager
+def throwaway_database(on_disk=False):
+    """
+    Run the block against a fresh test database and a private in-memory cache.
+
+    SQLite test databases live in memory, where a second thread's writes fail
+    with "table is locked" instead of waiting; ``on_disk`` puts it in a
+    temporary file for blocks that write from several threads.
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings.get('NAME')
+    tmpdir = None
+    if on_disk and connection.vendor == 'sqlite' and not old_test_name:
+        tmpdir = tempfile.mkdtemp()
+        test_settings['NAME'] = os.path.join(tmpdir, 'throwaway.sqlite3')
+    try:
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+                yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+    finally:
+        if tmpdir is not None:
+            test_settings['NAME'] = old_test_name
+            os.rmdir(tmpdir)
+
+
+def seed_hot_paths(events, participants, registrations, activities, seed=0, log=None, **client_options):
+    """
+    Seed the dataset and return (clients by role, busiest event id).
+
+    The volunteer is the one with the most registrations and the event the
+    one with the most sign-ups, so every view sees its worst case.
+    """
+    seed_dataset(events=events, participants=participants, registrations=registrations,
+                 activities=activities, seed=seed, log=log)
+    if connection.vendor in ('sqlite', 'postgresql'):
+        with connection.cursor() as db:
+            db.execute('ANALYZE')
+
+    admin = User.objects.create_superuser('hot-path-admin', 'hot-path-admin@example.com', 'unused')
+    participant = (
+        Participant.objects.annotate(registrations=Count('cleanupregistration'))
+        .order_by('-registrations').first()
+    )
+    event_id = CleanupEvent.objects.order_by('-registered_count').values_list('pk', flat=True).first()
+
+    admin_client = Client(**client_options)
+    admin_client.force_login(admin)
+    volunteer_client = Client(**client_options)
+    session = volunteer_client.session
+    session[PARTICIPANT_SESSION_KEY] = participant.pk
+    session.save()
+    return {'admin': admin_client, 'volunteer': volunteer_client, None: Client(**client_options)}, event_id
+
+
+def explain(sql):
+    """The query plan of ``sql``, one line per step."""
+    with connection.cursor() as db:
+        if connection.vendor == 'sqlite':
+            db.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in db.fetchall()]
+        db.execute(f'EXPLAIN {sql}')
+        return [row[0] for row in db.fetchall()]
+
+
+def full_scans(plan):
+    """(table, plan line) for every full table scan in ``plan``."""
+    pattern = SQLITE_FULL_SCAN if connection.vendor == 'sqlite' else POSTGRES_FULL_SCAN
+    for line in plan:
+        match = pattern.search(line.strip())
+        if match and match.group(1) not in IGNORED_TABLES:
+            yield match.group(1), line.strip()
+
+
+def plan_regressions(clients, event_id, log=None, show_plans=False):
+    """
+    Request every hot view and EXPLAIN each app query it issued.
+
+    Returns (label, table, detail) for every full table scan not in
+    ALLOWED_SCANS; a view that does not answer 200 is reported with a
+    table of None.
+    """
+    log = log or (lambda message: None)
+    failures = []
+    for label, url, who in hot_requests(event_id):
+        with CaptureQueriesContext(connection) as captured:
+            response = clients[who].get(url)
+        if response.status_code != 200:
+            failures.append((label, None, f'{url} returned {response.status_code}'))
+            continue
+
+        selects = [q['sql'] for q in captured.captured_queries
+                   if q['sql'].lstrip().upper().startswith(('SELECT', 'WITH')) and APP_TABLE.search(q['sql'])]
+        log(f'{label}: {len(captured.captured_queries)} queries')
+        for sql in selects:
+            plan = explain(sql)
+            if show_plans:
+                log(f'    {sql[:160]}')
+                for line in plan:
+                    log(f'      {line}')
+            for table, detail in full_scans(plan):
+                if (label, table) not in ALLOWED_SCANS:
+                    failures.append((label, table, detail))
+    return failures
@@ -0,0 +1,47 @@
+from django.db import connection, models
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def insert_rows(model, fields, rows, batch_size=5000):
+    """
+    INSERT plain tuples of ``fields`` values with executemany, skipping model
+    instances and per-row SQL compilation; the other columns get their defaults.
+
+    For bulk-loading rows nobody needs the primary keys of, where bulk_create
+    spends most of its time building objects rather than in the database.
+    """
+    meta = model._meta
+    concrete = [f for f in meta.concrete_fields if not f.primary_key]
+    given = [meta.get_field(name) for name in fields]
+    rest = [f for f in concrete if f not in given]
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(meta.db_table),
+        ', '.join(quote(f.column) for f in given + rest),
+        ', '.join(['%s'] * len(given + rest)),
+    )
+    defaults = tuple(f.get_db_prep_save(f.get_default(), connection) for f in rest)
+    adapt = connection.ops.adapt_datetimefield_value
+    stamps = [i for i, f in enumerate(given) if isinstance(f, models.DateTimeField)]
+    count = 0
+    with connection.cursor() as db:
+        for batch in batched(rows, batch_size):
+            params = []
+            for row in batch:
+                row = list(row)
+                for i in stamps:
+                    row[i] = adapt(row[i])
+                params.append((*row, *defaults))
+            db.executemany(sql, params)
+            count += len(batch)
+    return count
@@ -0,0 +1,110 @@
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import CleanupEvent
+from .pagination import encode_cursor, keyset_paginate
+
+FEED_CACHE_PREFIX = 'event_feed'
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+PREVIOUS_ORDERING = ('-date', '-id')
+UPCOMING_ORDERING = ('date', 'start_time', 'id')
+
+
+def previous_limit():
+    return getattr(settings, 'EVENT_FEED_PREVIOUS_LIMIT', 3)
+
+
+def upcoming_limit():
+    return getattr(settings, 'EVENT_FEED_UPCOMING_LIMIT', 12)
+
+
+def upcoming_horizon():
+    return timedelta(days=getattr(settings, 'EVENT_FEED_UPCOMING_DAYS', 365))
+
+
+@dataclass
+class EventFeed:
+    day: date
+    previous: list = field(default_factory=list)
+    current: list = field(default_factory=list)
+    upcoming: list = field(default_factory=list)
+    # Continues the previous bucket on the archive page (ordered by -date, -id).
+    previous_cursor: str = None
+    # Continues the upcoming bucket with upcoming_page() (ordered by date, start_time, id).
+    upcoming_cursor: str = None
+
+
+def _cache_key(day):
+    return f'{FEED_CACHE_PREFIX}:{day.isoformat()}'
+
+
+def build_event_feed(day):
+    """
+    Load everything the feed needs in one query and split it in Python.
+
+    Both ends of the window are bounded by count: the lower bound is the date
+    of the (limit + 1)-th most recent past event and the upper bound the date
+    of the (limit + 1)-th next upcoming one (never beyond the horizon), so a
+    busy calendar costs the same as a quiet one. Each capped bucket carries a
+    cursor for the rest.
+    """
+    limit = previous_limit()
+    ahead = upcoming_limit()
+    horizon = day + upcoming_horizon()
+    lower = Subquery(
+        CleanupEvent.objects.filter(date__lt=day).order_by('-date').values('date')[limit:limit + 1]
+    )
+    upper = Subquery(
+        CleanupEvent.objects.filter(date__gt=day).order_by('date').values('date')[ahead:ahead + 1]
+    )
+    events = CleanupEvent.objects.filter(
+        Q(date__gte=Coalesce(lower, date.min)) & Q(date__lte=Coalesce(upper, horizon)) & Q(date__lte=horizon)
+    ).order_by(*UPCOMING_ORDERING)
+
+    feed = EventFeed(day=day)
+    for event in events:
+        if event.date < day:
+            feed.previous.append(event)
+        elif event.date == day:
+            feed.current.append(event)
+        else:
+            feed.upcoming.append(event)
+
+    feed.previous.sort(key=lambda e: (e.date, e.id), reverse=True)
+    if len(feed.previous) > limit:
+        feed.previous = feed.previous[:limit]
+        last = feed.previous[-1]
+        feed.previous_cursor = encode_cursor([last.date, last.id])
+    if len(feed.upcoming) > ahead:
+        feed.upcoming = feed.upcoming[:ahead]
+        last = feed.upcoming[-1]
+        feed.upcoming_cursor = encode_cursor([getattr(last, name) for name in UPCOMING_ORDERING])
+    return feed
+
+
+def upcoming_page(cursor, day=None):
+    """The upcoming events after ``cursor`` (from EventFeed.upcoming_cursor), one seek query per page."""
+    day = day or date.today()
+    events = CleanupEvent.objects.filter(date__gt=day, date__lte=day + upcoming_horizon())
+    return keyset_paginate(events, UPCOMING_ORDERING, cursor, upcoming_limit())
+
+
+def get_event_feed(day=None):
+    day = day or date.today()
+    key = _cache_key(day)
+    feed = cache.get(key)
+    if feed is None:
+        feed = build_event_feed(day)
+        cache.set(key, feed, FEED_CACHE_TIMEOUT)
+    return feed
+
+
+def invalidate_event_feed():
+    # Only today's bucket is ever read; older keys expire on their own.
+    transaction.on_commit(lambda: cache.delete(_cache_key(date.today())))
@@ -0,0 +1,148 @@
+import csv
+import json
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .models import Activity, CleanupRegistration
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+@dataclass
+class Export:
+    """A named column list over a ``values_list`` queryset, read in pk order."""
+    name: str
+    columns: list
+    queryset: object
+
+    def rows(self):
+        # iterator() streams from a server-side cursor on PostgreSQL and with
+        # fetchmany() elsewhere, so memory stays flat however many rows there are.
+        return self.queryset.values_list(*[field for _, field in self.columns]).iterator(chunk_size=chunk_size())
+
+    @property
+    def header(self):
+        return [label for label, _ in self.columns]
+
+
+def roster_export(event):
+    return Export(
+        name=f'event-{event.pk}-roster',
+        columns=[
+            ('participant_id', 'participant_id'),
+            ('fullname', 'participant__fullname'),
+            ('username', 'participant__username'),
+            ('email', 'participant__email'),
+            ('contact_number', 'participant__contact_number'),
+            ('registered_at', 'registered_at'),
+            ('attended', 'attended'),
+            ('approved', 'approved'),
+        ],
+        queryset=CleanupRegistration.objects.filter(event=event).order_by('registered_at', 'id'),
+    )
+
+
+def registrations_export(event=None):
+    registrations = CleanupRegistration.objects.order_by('id')
+    if event is not None:
+        registrations = registrations.filter(event=event)
+    return Export(
+        name='registrations' if event is None else f'event-{event.pk}-registrations',
+        columns=[
+            ('id', 'id'),
+            ('participant_id', 'participant_id'),
+            ('participant_email', 'participant__email'),
+            ('event_id', 'event_id'),
+            ('event_name', 'event__name'),
+            ('event_date', 'event__date'),
+            ('registered_at', 'registered_at'),
+            ('attended', 'attended'),
+            ('approved', 'approved'),
+            ('points_awarded', 'points_awarded'),
+            ('approved_at', 'approved_at'),
+        ],
+        queryset=registrations,
+    )
+
+
+def points_export(event=None):
+    activities = Activity.objects.order_by('id')
+    if event is not None:
+        activities = activities.filter(event=event)
+    return Export(
+        name='points' if event is None else f'event-{event.pk}-points',
+        columns=[
+            ('id', 'id'),
+            ('participant_id', 'participant_id'),
+            ('participant_email', 'participant__email'),
+            ('event_id', 'event_id'),
+            ('cleanup_type', 'cleanup_type'),
+            ('points_earned', 'points_earned'),
+            ('balance_after', 'balance_after'),
+            ('date_participated', 'date_participated'),
+            ('description', 'description'),
+        ],
+        queryset=activities,
+    )
+
+
+EXPORTS = {
+    'roster': roster_export,
+    'registrations': registrations_export,
+    'points': points_export,
+}
+
+# Exports that only make sense for a single event.
+EVENT_REQUIRED = {'roster'}
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the csv writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def _plain(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def csv_lines(export):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(export.header)
+    for row in export.rows():
+        yield writer.writerow([_plain(value) for value in row])
+
+
+def jsonl_lines(export):
+    header = export.header
+    for row in export.rows():
+        yield json.dumps(dict(zip(header, map(_plain, row))), ensure_ascii=False) + '\n'
+
+
+def render_lines(export, fmt):
+    return csv_lines(export) if fmt == 'csv' else jsonl_lines(export)
+
+
+def buffered(lines, size=64 * 1024):
+    """
+    Group short lines into blocks so a streamed response is not one write per
+    row. The first line goes out on its own so the download starts at once.
+    """
+    block, length, started = [], 0, False
+    for line in lines:
+        block.append(line)
+        length += len(line)
+        if length >= size or not started:
+            yield ''.join(block)
+            block, length, started = [], 0, True
+    if block:
+        yield ''.join(block)
@@ -49,7 +49,7 @@ class ParticipantRegistrationForm(forms.ModelForm):
         return contact_number
 
     def clean_email(self):
-        email = self.cleaned_data.get('email')
+        email = (self.cleaned_data.get('email') or '').strip().lower()
         if email and Participant.objects.filter(email=email).exists():
             raise forms.ValidationError("An account with this email already exists.")
         return email
@@ -76,6 +76,18 @@ class ParticipantRegistrationForm(forms.ModelForm):
             participant.save()
         return participant
 # ...existing code...
+class ProofUploadForm(forms.Form):
+    proof_image = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': 'image/jpeg,image/png,image/webp'}),
+        label='Photo or screenshot'
+    )
+    proof_notes = forms.CharField(
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Anything the admin should know'}),
+        required=False,
+        label='Notes'
+    )
+
+
 class VolunteerLoginForm(forms.Form):
     identifier = forms.CharField(
         widget=forms.TextInput(attrs={
@@ -0,0 +1,113 @@
+import heapq
+from dataclasses import dataclass
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Activity, CleanupRegistration
+from .pagination import decode_raw_cursor, encode_cursor
+
+# Entries are ordered newest first by (timestamp, kind, id); the kind breaks
+# ties between a registration and an activity written in the same instant.
+REGISTRATION = 1
+ACTIVITY = 0
+
+
+@dataclass
+class HistoryPage:
+    entries: list
+    next_cursor: str = None
+
+
+def _parse_cursor(token):
+    raw = decode_raw_cursor(token)
+    if raw is None or len(raw) != 3:
+        return None
+    try:
+        timestamp, kind, pk = parse_datetime(raw[0]), int(raw[1]), int(raw[2])
+    except (TypeError, ValueError):
+        return None
+    if timestamp is None:
+        return None
+    return timestamp, kind, pk
+
+
+def _after(cursor, kind, field):
+    """Seek condition selecting rows of ``kind`` that sort after ``cursor``."""
+    timestamp, cursor_kind, pk = cursor
+    if kind < cursor_kind:
+        return Q(**{f'{field}__lte': timestamp})
+    if kind > cursor_kind:
+        return Q(**{f'{field}__lt': timestamp})
+    return Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk})
+
+
+def _registration_entry(reg):
+    awarded = reg.points_awarded
+    return {
+        'type': 'event',
+        'event_name': reg.event.name,
+        'event_date': reg.event.date,
+        'event_time': reg.event.start_time,
+        'points': reg.event.points if awarded else 0,
+        'points_status': 'Awarded' if awarded else 'Pending',
+        'attended': reg.attended,
+        'registered_at': reg.registered_at,
+    }
+
+
+def _activity_entry(activity):
+    return {
+        'type': 'activity',
+        'event_name': activity.event.name if activity.event else (activity.description or 'Points awarded'),
+        'event_date': activity.date_participated,
+        'event_time': activity.date_participated,
+        'points': activity.points_earned,
+        'points_status': 'Awarded',
+        'attended': True,
+        'registered_at': activity.date_participated,
+    }
+
+
+def combined_history_page(participant, cursor=None, per_page=20):
+    """
+    One page of a volunteer's registrations and ledger entries, newest first.
+
+    Each source is read with a seek query limited to ``per_page + 1`` rows and
+    the two ordered streams are merged lazily, so a page costs two queries no
+    matter how long the history is.
+    """
+    position = _parse_cursor(cursor)
+
+    registrations = (
+        CleanupRegistration.objects.filter(participant=participant)
+        .select_related('event')
+        .only('registered_at', 'attended', 'points_awarded',
+              'event__name', 'event__date', 'event__start_time', 'event__points')
+        .order_by('-registered_at', '-id')
+    )
+    activities = (
+        Activity.objects.filter(participant=participant)
+        .select_related('event')
+        .only('date_participated', 'points_earned', 'description', 'event__name')
+        .order_by('-date_participated', '-id')
+    )
+    if position is not None:
+        registrations = registrations.filter(_after(position, REGISTRATION, 'registered_at'))
+        activities = activities.filter(_after(position, ACTIVITY, 'date_participated'))
+
+    streams = heapq.merge(
+        ((reg.registered_at, REGISTRATION, reg.id, reg) for reg in registrations[:per_page + 1]),
+        ((act.date_participated, ACTIVITY, act.id, act) for act in activities[:per_page + 1]),
+        key=lambda item: item[:3],
+        reverse=True,
+    )
+
+    entries = []
+    last = None
+    for timestamp, kind, pk, obj in streams:
+        if len(entries) == per_page:
+            return HistoryPage(entries, encode_cursor([last[0].isoformat(), last[1], last[2]]))
+        entries.append(_registration_entry(obj) if kind == REGISTRATION else _activity_entry(obj))
+        last = (timestamp, kind, pk)
+    return HistoryPage(entries)
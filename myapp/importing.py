@@ -0,0 +1,347 @@
+import csv
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import django
+from django import forms
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import IntegrityError, transaction
+
+from .bulk import batched
+from .event_feed import invalidate_event_feed
+from .forms import CleanupEventForm, ParticipantRegistrationForm
+from .models import CleanupEvent, CleanupRegistration, Participant
+from .page_cache import invalidate_pages
+from .points import refresh_points_summaries
+from .registration import recount_event_counters
+
+FORMATS = ('csv', 'jsonl')
+
+
+@dataclass
+class Rejection:
+    line: int
+    errors: dict
+    row: dict
+
+
+@dataclass
+class ImportResult:
+    read: int = 0
+    created: int = 0
+    rejected: int = 0
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    raise ValueError(f'Cannot tell the format of {path!r}; pass --format')
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict) one record at a time; nothing is read ahead."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        return
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, {'__error__': f'Invalid JSON: {exc}'}
+            continue
+        yield number, row if isinstance(row, dict) else {'__error__': 'Expected a JSON object'}
+
+
+def open_source(path):
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+    return open(path, encoding='utf-8-sig', newline='')
+
+
+def _setup_worker():
+    # Spawned (non-forked) workers start with an unconfigured Django.
+    django.setup()
+
+
+class ParticipantImportForm(ParticipantRegistrationForm):
+    """
+    The registration form's field rules, minus what import does per chunk instead.
+
+    Uniqueness is checked with one query per column per chunk rather than per
+    row, and rows may carry an already-encoded ``password_hash`` in place of a
+    plain ``password``.
+    """
+    password = forms.CharField(min_length=6, required=False)
+    confirm_password = None
+    password_hash = forms.CharField(required=False)
+
+    def clean_email(self):
+        return (self.cleaned_data.get('email') or '').strip().lower()
+
+    def clean_password_hash(self):
+        encoded = self.cleaned_data.get('password_hash')
+        if encoded:
+            try:
+                identify_hasher(encoded)
+            except ValueError:
+                raise forms.ValidationError('Not a hash produced by a configured password hasher.')
+        return encoded
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if 'password' in self.errors or 'password_hash' in self.errors:
+            return cleaned_data
+        if not cleaned_data.get('password') and not cleaned_data.get('password_hash'):
+            raise forms.ValidationError('Each row needs a password or a password_hash.')
+        return cleaned_data
+
+    def validate_unique(self):
+        pass
+
+
+class RegistrationImportForm(forms.Form):
+    participant_email = forms.EmailField()
+    event_id = forms.IntegerField(min_value=1)
+    attended = forms.BooleanField(required=False)
+
+    def clean_participant_email(self):
+        return self.cleaned_data['participant_email'].strip().lower()
+
+
+class Importer:
+    """
+    Validate rows in chunks of ``batch_size`` and write each chunk with one
+    ``bulk_create`` in its own transaction.
+
+    If a chunk hits a constraint (a concurrent signup, say) it is retried row
+    by row in savepoints so only the offending rows are rejected.
+    """
+    model = None
+    form_class = None
+
+    def __init__(self, batch_size=1000, workers=None, dry_run=False, on_reject=None):
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.dry_run = dry_run
+        self.on_reject = on_reject or (lambda rejection: None)
+        self.result = ImportResult()
+
+    def run(self, rows, log=None):
+        log = log or (lambda message: None)
+        with self:
+            for chunk in batched(rows, self.batch_size):
+                self.result.read += len(chunk)
+                accepted = self.check_chunk([item for item in map(self.validate, chunk) if item])
+                if accepted:
+                    self.prepare(accepted)
+                    if not self.dry_run:
+                        self.write(accepted)
+                    else:
+                        self.result.created += len(accepted)
+                log(f'{self.result.read} read, {self.result.created} created, {self.result.rejected} rejected')
+        if self.result.created and not self.dry_run:
+            self.finish()
+        return self.result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def reject(self, line, row, errors):
+        self.result.rejected += 1
+        self.on_reject(Rejection(line=line, errors=errors, row=row))
+
+    def validate(self, item):
+        line, row = item
+        if '__error__' in row:
+            self.reject(line, row, {'__all__': [row['__error__']]})
+            return None
+        form = self.form_class(data=row)
+        if not form.is_valid():
+            self.reject(line, row, {field: list(errors) for field, errors in form.errors.items()})
+            return None
+        return line, row, form
+
+    def check_chunk(self, items):
+        return items
+
+    def prepare(self, items):
+        pass
+
+    def build(self, items):
+        return [form.instance for _, _, form in items]
+
+    def write(self, items):
+        objects = self.build(items)
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(objects, batch_size=self.batch_size)
+            self.result.created += len(objects)
+        except IntegrityError:
+            for (line, row, _), obj in zip(items, objects):
+                obj.pk = None
+                try:
+                    with transaction.atomic():
+                        obj.save(force_insert=True)
+                except IntegrityError as exc:
+                    self.reject(line, row, {'__all__': [str(exc)]})
+                else:
+                    self.result.created += 1
+
+    def finish(self):
+        pass
+
+
+class ParticipantImporter(Importer):
+    model = Participant
+    form_class = ParticipantImportForm
+    unique_fields = ('username', 'email', 'contact_number')
+
+    def __enter__(self):
+        self.seen = {field: set() for field in self.unique_fields}
+        self.pool = None
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_setup_worker)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.pool is not None:
+            self.pool.shutdown()
+        return False
+
+    def check_chunk(self, items):
+        taken = {}
+        for field in self.unique_fields:
+            values = {form.cleaned_data[field] for _, _, form in items}
+            taken[field] = set(
+                Participant.objects.filter(**{f'{field}__in': values}).values_list(field, flat=True)
+            ) | self.seen[field]
+
+        accepted = []
+        for line, row, form in items:
+            duplicates = {
+                field: [f'A participant with this {field} already exists.']
+                for field in self.unique_fields if form.cleaned_data[field] in taken[field]
+            }
+            if duplicates:
+                self.reject(line, row, duplicates)
+                continue
+            for field in self.unique_fields:
+                taken[field].add(form.cleaned_data[field])
+                self.seen[field].add(form.cleaned_data[field])
+            accepted.append((line, row, form))
+        return accepted
+
+    def prepare(self, items):
+        # PBKDF2 dominates the import; spread it over worker processes.
+        plain = [(form, form.cleaned_data['password']) for _, _, form in items
+                 if not form.cleaned_data.get('password_hash')]
+        if self.pool is not None and len(plain) > 1:
+            chunksize = max(1, len(plain) // (self.workers * 4))
+            hashes = self.pool.map(make_password, [raw for _, raw in plain], chunksize=chunksize)
+        else:
+            hashes = map(make_password, [raw for _, raw in plain])
+        for (form, _), encoded in zip(plain, hashes):
+            form.instance.password = encoded
+        for _, _, form in items:
+            if form.cleaned_data.get('password_hash'):
+                form.instance.password = form.cleaned_data['password_hash']
+
+
+class EventImporter(Importer):
+    model = CleanupEvent
+    form_class = CleanupEventForm
+
+    def finish(self):
+        # bulk_create sends no post_save, so the event signals never fired.
+        invalidate_event_feed()
+        invalidate_pages('events')
+
+
+class RegistrationImporter(Importer):
+    """
+    Rows name the volunteer by email and the event by id. Seats are checked
+    against each event's stored count plus what this import has already
+    added; the counters are recounted for the touched events at the end.
+    """
+    model = CleanupRegistration
+    form_class = RegistrationImportForm
+
+    def __enter__(self):
+        self.seats_taken = {}
+        self.touched_events = set()
+        self.attended_participants = set()
+        return self
+
+    def check_chunk(self, items):
+        emails = {form.cleaned_data['participant_email'] for _, _, form in items}
+        event_ids = {form.cleaned_data['event_id'] for _, _, form in items}
+        participants = dict(Participant.objects.filter(email__in=emails).values_list('email', 'pk'))
+        events = {
+            pk: (registered, capacity) for pk, registered, capacity in
+            CleanupEvent.objects.filter(pk__in=event_ids).values_list('pk', 'registered_count', 'max_participants')
+        }
+        for pk, (registered, _) in events.items():
+            self.seats_taken.setdefault(pk, registered)
+        existing = set(
+            CleanupRegistration.objects.filter(participant_id__in=participants.values(), event_id__in=events)
+            .values_list('participant_id', 'event_id')
+        )
+
+        accepted = []
+        for line, row, form in items:
+            participant_id = participants.get(form.cleaned_data['participant_email'])
+            event_id = form.cleaned_data['event_id']
+            if participant_id is None:
+                self.reject(line, row, {'participant_email': ['No participant with this email.']})
+            elif event_id not in events:
+                self.reject(line, row, {'event_id': ['No event with this id.']})
+            elif (participant_id, event_id) in existing:
+                self.reject(line, row, {'__all__': ['Already registered for this event.']})
+            elif self.seats_taken[event_id] >= events[event_id][1]:
+                self.reject(line, row, {'__all__': ['This event is already full.']})
+            else:
+                existing.add((participant_id, event_id))
+                self.seats_taken[event_id] += 1
+                form.participant_id = participant_id
+                accepted.append((line, row, form))
+        return accepted
+
+    def build(self, items):
+        objects = []
+        for _, _, form in items:
+            self.touched_events.add(form.cleaned_data['event_id'])
+            if form.cleaned_data['attended']:
+                self.attended_participants.add(form.participant_id)
+            objects.append(CleanupRegistration(
+                participant_id=form.participant_id,
+                event_id=form.cleaned_data['event_id'],
+                attended=form.cleaned_data['attended'],
+            ))
+        return objects
+
+    def finish(self):
+        recount_event_counters(CleanupEvent.objects.filter(pk__in=self.touched_events))
+        if self.attended_participants:
+            refresh_points_summaries(self.attended_participants)
+        invalidate_event_feed()
+
+
+IMPORTERS = {
+    'participants': ParticipantImporter,
+    'events': EventImporter,
+    'registrations': RegistrationImporter,
+}
@@ -0,0 +1,166 @@
+import logging
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def visibility_timeout():
+    return getattr(settings, 'JOBS_VISIBILITY_TIMEOUT', 300)
+
+
+def retry_delay(attempts):
+    # Exponential backoff: 10s, 20s, 40s, ... capped at an hour.
+    base = getattr(settings, 'JOBS_RETRY_BACKOFF', 10)
+    return min(base * 2 ** max(attempts - 1, 0), 3600)
+
+
+def job(func=None, *, max_attempts=5):
+    """
+    Mark ``func`` as runnable by the worker and give it ``func.delay(**kwargs)``.
+
+    Jobs are looked up by dotted path, so they must live at module level, and
+    their keyword arguments must be JSON-serialisable. A job can run more than
+    once (a worker may die after finishing it), so it must be safe to repeat.
+    """
+    def register(func):
+        func.is_job = True
+        func.max_attempts = max_attempts
+        func.delay = lambda **kwargs: enqueue(func, **kwargs)
+        return func
+    return register(func) if func is not None else register
+
+
+def _job_name(func):
+    if not getattr(func, 'is_job', False):
+        raise ValueError(f'{func!r} is not decorated with @job')
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def _create(func, kwargs, delay=None, dedupe_key=None):
+    entry = Job.objects.create(
+        name=_job_name(func),
+        payload=kwargs,
+        max_attempts=func.max_attempts,
+        run_at=timezone.now() + (delay or timedelta()),
+        dedupe_key=dedupe_key,
+    )
+    if getattr(settings, 'JOBS_EAGER', False):
+        transaction.on_commit(lambda: run_claimed(claim(f'eager-{uuid.uuid4().hex}', pks=[entry.pk])))
+    return entry
+
+
+def enqueue(func, *, delay=None, **kwargs):
+    """
+    Queue ``func(**kwargs)`` for the worker.
+
+    The row is written in the caller's transaction, so the job only becomes
+    visible if that transaction commits. With ``JOBS_EAGER`` the job runs in
+    this process right after the commit instead, for development without a
+    worker.
+    """
+    return _create(func, kwargs, delay=delay)
+
+
+def enqueue_periodically(func, interval, **kwargs):
+    """
+    Queue ``func(**kwargs)`` at most once per ``interval`` seconds, however
+    many requests and processes ask; returns the Job, or None if this
+    interval's job already exists.
+
+    Each interval has one ``dedupe_key`` and the column is unique, so the
+    database decides which caller wins whatever the cache backend. Callers
+    that lose pay one indexed lookup.
+    """
+    key = f'{_job_name(func)}:{int(time.time() // interval)}'
+    if Job.objects.filter(dedupe_key=key).exists():
+        return None
+    try:
+        with transaction.atomic():
+            return _create(func, kwargs, dedupe_key=key)
+    except IntegrityError:
+        # Another caller queued it between the lookup and the insert.
+        return None
+
+
+def _claimable(now):
+    return Job.objects.filter(
+        Q(status=Job.QUEUED, run_at__lte=now) | Q(status=Job.RUNNING, locked_until__lt=now)
+    )
+
+
+def claim(worker, limit=1, pks=None):
+    """
+    Lock up to ``limit`` due jobs for ``worker`` and return them.
+
+    The candidates are re-checked in the UPDATE itself and tagged with a fresh
+    token, so two workers racing for the same rows cannot both win them even
+    where SELECT ... FOR UPDATE SKIP LOCKED is unavailable (SQLite).
+    """
+    now = timezone.now()
+    token = f'{worker}:{uuid.uuid4().hex[:8]}'
+    with transaction.atomic():
+        # A job whose worker keeps dying has used its attempts up too.
+        Job.objects.filter(status=Job.RUNNING, locked_until__lt=now, attempts__gte=F('max_attempts')).update(
+            status=Job.FAILED, locked_until=None, finished_at=now,
+            last_error='Lock expired on the last attempt; the worker probably died.',
+        )
+        candidates = _claimable(now).order_by('run_at', 'pk')
+        if pks is not None:
+            candidates = candidates.filter(pk__in=pks)
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('pk', flat=True)[:limit])
+        if not ids:
+            return []
+        _claimable(now).filter(pk__in=ids).update(
+            status=Job.RUNNING, locked_by=token, attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=visibility_timeout()),
+        )
+    return list(Job.objects.filter(pk__in=ids, locked_by=token).order_by('run_at', 'pk'))
+
+
+def run(entry):
+    """Run one claimed job and record the outcome; returns True on success."""
+    attempts = entry.attempts
+    finished = Job.objects.filter(pk=entry.pk, locked_by=entry.locked_by)
+    try:
+        func = import_string(entry.name)
+        if not getattr(func, 'is_job', False):
+            raise ValueError(f'{entry.name} is not a job')
+        func(**entry.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Job %s (%s) failed on attempt %s', entry.pk, entry.name, attempts)
+        if attempts >= entry.max_attempts:
+            finished.update(status=Job.FAILED, last_error=error, locked_until=None, finished_at=timezone.now())
+        else:
+            finished.update(status=Job.QUEUED, last_error=error, locked_until=None,
+                            run_at=timezone.now() + timedelta(seconds=retry_delay(attempts)))
+        return False
+    finished.update(status=Job.DONE, locked_until=None, finished_at=timezone.now())
+    return True
+
+
+def run_claimed(entries):
+    return [run(entry) for entry in entries]
+
+
+def prune_jobs(older_than=None):
+    """Delete finished jobs past the retention period; returns the number removed."""
+    if older_than is None:
+        older_than = timedelta(days=getattr(settings, 'JOBS_RETENTION_DAYS', 7))
+    deleted, _ = Job.objects.filter(
+        status__in=[Job.DONE, Job.FAILED], finished_at__lt=timezone.now() - older_than,
+    ).delete()
+    return deleted
@@ -0,0 +1,264 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.db.models.functions import TruncMonth
+
+from .bulk import insert_rows
+from .models import Activity, LeaderboardEntry, LeaderboardNode
+
+# Scores are bucketed into a Fenwick tree over [0, MAX_SCORE]; a rank lookup
+# reads at most 2 * SCORE_BITS cells and an update touches at most SCORE_BITS.
+SCORE_BITS = 20
+MAX_SCORE = (1 << SCORE_BITS) - 1
+
+GLOBAL = 'global'
+
+
+def place_board(place):
+    return f'place:{place}'
+
+
+def month_board(when):
+    return f'month:{when:%Y-%m}'
+
+
+def boards_for(cleanup_type, when):
+    return [GLOBAL, place_board(cleanup_type), month_board(when)]
+
+
+def _slot(score):
+    # Fenwick trees are 1-based; negative balances share the lowest slot.
+    return min(max(score, 0), MAX_SCORE) + 1
+
+
+def _update_path(slot):
+    path = []
+    while slot <= MAX_SCORE + 1:
+        path.append(slot)
+        slot += slot & -slot
+    return path
+
+
+def _prefix_path(slot):
+    path = []
+    while slot > 0:
+        path.append(slot)
+        slot -= slot & -slot
+    return path
+
+
+def _apply_cells(board, changes):
+    """Add ``changes`` ({node: delta}) to the tree with one insert and one UPDATE."""
+    changes = {node: delta for node, delta in changes.items() if delta}
+    if not changes:
+        return
+    LeaderboardNode.objects.bulk_create(
+        [LeaderboardNode(board=board, node=node) for node in changes], ignore_conflicts=True
+    )
+    LeaderboardNode.objects.filter(board=board, node__in=changes).update(
+        count=F('count') + _by_value('node', changes)
+    )
+
+
+def _by_value(field, deltas):
+    """CASE expression mapping each ``field`` value to its delta, one WHEN per distinct delta."""
+    groups = defaultdict(list)
+    for key, delta in deltas.items():
+        groups[delta].append(key)
+    if len(groups) == 1:
+        return Value(next(iter(groups)))
+    return Case(
+        *[When(**{f'{field}__in': keys}, then=Value(delta)) for delta, keys in groups.items()],
+        default=Value(0),
+    )
+
+
+def _shift(board, slot, delta):
+    _apply_cells(board, dict.fromkeys(_update_path(slot), delta))
+
+
+def add_score(participant_id, board, delta):
+    """Move one participant's score on ``board`` and keep the tree in step."""
+    with transaction.atomic():
+        entries = LeaderboardEntry.objects.select_for_update().filter(board=board, participant_id=participant_id)
+        entry = entries.only('score').first()
+        if entry is None:
+            try:
+                with transaction.atomic():
+                    LeaderboardEntry.objects.create(board=board, participant_id=participant_id, score=delta)
+            except IntegrityError:
+                # Another award created the entry first; fall through and update it.
+                entry = entries.only('score').get()
+            else:
+                _shift(board, _slot(delta), 1)
+                return
+
+        if not delta:
+            return
+        old_slot, new_slot = _slot(entry.score), _slot(entry.score + delta)
+        entries.update(score=F('score') + delta)
+        if old_slot != new_slot:
+            _shift(board, old_slot, -1)
+            _shift(board, new_slot, 1)
+
+
+def add_scores(board, deltas):
+    """
+    Move many participants' scores on ``board`` at once ({participant_id: delta}).
+
+    A fixed number of statements whatever the number of participants, so a
+    bulk approval costs the same for 5 or 500.
+    """
+    if not deltas:
+        return
+    with transaction.atomic():
+        entries = LeaderboardEntry.objects.select_for_update().filter(board=board, participant_id__in=deltas)
+        scores = dict(entries.values_list('participant_id', 'score'))
+        missing = [pid for pid in deltas if pid not in scores]
+        cells = defaultdict(int)
+        if missing:
+            try:
+                with transaction.atomic():
+                    LeaderboardEntry.objects.bulk_create(
+                        [LeaderboardEntry(board=board, participant_id=pid, score=deltas[pid]) for pid in missing]
+                    )
+            except IntegrityError:
+                # A concurrent award created some of these entries; take the slow path for them.
+                for pid in missing:
+                    add_score(pid, board, deltas[pid])
+            else:
+                for pid in missing:
+                    for node in _update_path(_slot(deltas[pid])):
+                        cells[node] += 1
+
+        moved = {}
+        for pid, score in scores.items():
+            delta = deltas[pid]
+            if not delta:
+                continue
+            moved[pid] = delta
+            old_slot, new_slot = _slot(score), _slot(score + delta)
+            if old_slot != new_slot:
+                for node in _update_path(old_slot):
+                    cells[node] -= 1
+                for node in _update_path(new_slot):
+                    cells[node] += 1
+        if moved:
+            entries.filter(participant_id__in=moved).update(score=F('score') + _by_value('participant_id', moved))
+        _apply_cells(board, cells)
+
+
+def record_activity(activity):
+    for board in boards_for(activity.cleanup_type, activity.date_participated):
+        add_score(activity.participant_id, board, activity.points_earned)
+
+
+def record_activities(activities):
+    """Bulk counterpart of record_activity(): one add_scores() call per board touched."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    for activity in activities:
+        for board in boards_for(activity.cleanup_type, activity.date_participated):
+            deltas[board][activity.participant_id] += activity.points_earned
+    for board, board_deltas in deltas.items():
+        add_scores(board, board_deltas)
+
+
+def _prefix_counts(board, slots):
+    paths = {slot: _prefix_path(slot) for slot in slots}
+    nodes = {node for path in paths.values() for node in path}
+    counts = dict(
+        LeaderboardNode.objects.filter(board=board, node__in=nodes).values_list('node', 'count')
+    )
+    return {slot: sum(counts.get(node, 0) for node in path) for slot, path in paths.items()}
+
+
+def rank_of(participant, board=GLOBAL):
+    """1-based rank (ties share a rank), or None if the participant is not on the board."""
+    score = (
+        LeaderboardEntry.objects.filter(board=board, participant=participant)
+        .values_list('score', flat=True).first()
+    )
+    if score is None:
+        return None
+    slot = _slot(score)
+    prefix = _prefix_counts(board, [slot, MAX_SCORE + 1])
+    return 1 + prefix[MAX_SCORE + 1] - prefix[slot]
+
+
+def top(board=GLOBAL, limit=10):
+    return list(
+        LeaderboardEntry.objects.filter(board=board)
+        .select_related('participant')
+        .only('score', 'participant__fullname', 'participant__username')
+        .order_by('-score', 'participant_id')[:limit]
+    )
+
+
+def remove_participant(participant_id):
+    """Take a participant's entries out of every tree before the rows are deleted."""
+    for board, score in LeaderboardEntry.objects.filter(participant_id=participant_id).values_list('board', 'score'):
+        _shift(board, _slot(score), -1)
+
+
+def _ledger_scores(activities):
+    """{(board, participant_id): total} for ``activities``, with three GROUP BY queries."""
+    activities = activities.order_by()
+    scores = defaultdict(int)
+    for participant_id, total in (
+        activities.values('participant').annotate(total=Sum('points_earned'))
+        .values_list('participant', 'total')
+    ):
+        scores[(GLOBAL, participant_id)] += total
+    for participant_id, place, total in (
+        activities.values('participant', 'cleanup_type').annotate(total=Sum('points_earned'))
+        .values_list('participant', 'cleanup_type', 'total')
+    ):
+        scores[(place_board(place), participant_id)] += total
+    for participant_id, month, total in (
+        activities.annotate(month=TruncMonth('date_participated'))
+        .values('participant', 'month').annotate(total=Sum('points_earned'))
+        .values_list('participant', 'month', 'total')
+    ):
+        scores[(month_board(month), participant_id)] += total
+    return scores
+
+
+def record_ledger(participant_ids):
+    """
+    Put the ledger totals of ``participant_ids`` on the boards, leaving everyone else alone.
+
+    For rows written straight to the ledger (seeding) that never went
+    through record_activity(); participants already scored would be counted twice.
+    """
+    deltas = defaultdict(dict)
+    for (board, participant_id), score in _ledger_scores(
+        Activity.objects.filter(participant_id__in=participant_ids)
+    ).items():
+        deltas[board][participant_id] = score
+    for board, board_deltas in deltas.items():
+        add_scores(board, board_deltas)
+
+
+def rebuild_leaderboards(batch_size=5000):
+    """Recompute every board from the Activity ledger with three GROUP BY queries."""
+    scores = _ledger_scores(Activity.objects.all())
+
+    cells = defaultdict(int)
+    for (board, _), score in scores.items():
+        for node in _update_path(_slot(score)):
+            cells[(board, node)] += 1
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardNode.objects.all().delete()
+        # A board per month means millions of entries on a large ledger; skip the model instances.
+        insert_rows(
+            LeaderboardEntry, ['board', 'participant_id', 'score'],
+            ((board, pid, score) for (board, pid), score in scores.items()), batch_size,
+        )
+        insert_rows(
+            LeaderboardNode, ['board', 'node', 'count'],
+            ((board, node, count) for (board, node), count in cells.items()), batch_size,
+        )
+    return len(scores)
@@ -0,0 +1,177 @@
+import json
+import logging
+import platform
+import statistics
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from myapp.benchmarks import hot_requests, seed_hot_paths, throwaway_database
+from myapp.metrics import SqlCounter
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered) + 0.5) - 1))]
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway database, drive every hot view through the test client and write '
+            'p50/p95 latency and query counts to JSON, optionally compared with a stored baseline')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=3000)
+        parser.add_argument('--participants', type=int, default=5000)
+        parser.add_argument('--registrations', type=int, default=40000)
+        parser.add_argument('--activities', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per view')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per view first')
+        parser.add_argument('--only', action='append', default=[], help='Bench only views whose label starts '
+                            'with this (repeatable)')
+        parser.add_argument('--output', default='bench.json', help="Where to write the results ('-' for stdout)")
+        parser.add_argument('--baseline', help='Earlier results to compare with; regressions make the command fail')
+        parser.add_argument('--tolerance', type=float, default=1.5,
+                            help='Allowed p95 ratio against the baseline before it counts as a regression')
+        parser.add_argument('--page-cache', action='store_true',
+                            help='Let anonymous pages come from the page cache (by default every request renders)')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as stream:
+                    baseline = json.load(stream)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read baseline: {exc}')
+
+        dataset = {key: options[key] for key in ('events', 'participants', 'registrations', 'activities', 'seed')}
+        # Keep the request metrics middleware out of the numbers; a timeout of 0 stores nothing.
+        overrides = {'METRICS_SAMPLE_RATE': 0}
+        if not options['page_cache']:
+            overrides['PAGE_CACHE_TIMEOUT'] = 0
+        with throwaway_database(), override_settings(**overrides):
+            started = time.perf_counter()
+            clients, event_id = seed_hot_paths(
+                **dataset, raise_request_exception=False,
+                log=lambda message: self.stdout.write(f'  seeding {message}') if options['verbosity'] > 1 else None,
+            )
+            self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+            results = self.run_views(clients, event_id, options)
+
+        failed = {label: row['status'] for label, row in results.items()
+                  if any(not 200 <= status < 300 for status in row['status'])}
+        if failed:
+            # Timings of an error page are not worth keeping, least of all as a baseline.
+            for label, statuses in failed.items():
+                self.stderr.write(f'  {label}: returned {", ".join(map(str, statuses))}')
+            raise CommandError(f'{len(failed)} view(s) failed; no results written')
+
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'dataset': dataset,
+                'repeat': options['repeat'],
+                'page_cache': options['page_cache'],
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+            },
+            'results': results,
+        }
+        text = json.dumps(report, indent=2, sort_keys=True) + '\n'
+        if options['output'] == '-':
+            self.stdout.write(text, ending='')
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(text)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+        regressions = self.compare(report, baseline, options['tolerance']) if baseline else []
+        if regressions:
+            raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
+        self.stdout.write(self.style.SUCCESS(f'✅ Benchmarked {len(results)} view(s)'))
+
+    def run_views(self, clients, event_id, options):
+        # A failing view is reported in the table, not with a traceback per request.
+        request_logger = logging.getLogger('django.request')
+        request_logger.disabled = True
+        try:
+            return self._run_views(clients, event_id, options)
+        finally:
+            request_logger.disabled = False
+
+    def _run_views(self, clients, event_id, options):
+        results = {}
+        self.stdout.write(f'{"view":34} {"status":>6} {"p50 ms":>8} {"p95 ms":>8} {"queries":>8} {"KB":>8}')
+        for label, url, who in hot_requests(event_id):
+            if options['only'] and not label.startswith(tuple(options['only'])):
+                continue
+            client = clients[who]
+            for _ in range(options['warmup']):
+                client.get(url)
+
+            timings, queries, statuses, size = [], set(), set(), 0
+            for _ in range(options['repeat']):
+                counter = SqlCounter()
+                with connection.execute_wrapper(counter):
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.add(counter.queries)
+                statuses.add(response.status_code)
+                size = len(response.content)
+
+            results[label] = {
+                'url': url,
+                'status': sorted(statuses),
+                'p50_ms': round(percentile(timings, 0.50), 3),
+                'p95_ms': round(percentile(timings, 0.95), 3),
+                'mean_ms': round(statistics.fmean(timings), 3),
+                # Normally constant; a range means some requests hit a cache the others missed.
+                'queries': max(queries),
+                'queries_min': min(queries),
+                'bytes': size,
+            }
+            row = results[label]
+            status = ','.join(map(str, row['status']))
+            self.stdout.write(f'{label:34} {status:>6} {row["p50_ms"]:8.2f} {row["p95_ms"]:8.2f} '
+                              f'{row["queries"]:8d} {size / 1024:8.1f}')
+        return results
+
+    def compare(self, report, baseline, tolerance):
+        """Print the change against ``baseline``; returns the regressions."""
+        for key in ('dataset', 'page_cache', 'database'):
+            if baseline.get('meta', {}).get(key) != report['meta'][key]:
+                self.stderr.write(f'Warning: the baseline was measured with a different {key}')
+        results, before = report['results'], baseline.get('results', {})
+        regressions = []
+        self.stdout.write(f'\n{"view":34} {"p95 ms":>18} {"queries":>12}')
+        for label, row in results.items():
+            old = before.get(label)
+            if old is None:
+                self.stdout.write(f'{label:34} {"(new)":>18}')
+                continue
+            ratio = row['p95_ms'] / old['p95_ms'] if old['p95_ms'] else 1.0
+            line = (f'{label:34} {old["p95_ms"]:8.2f} → {row["p95_ms"]:7.2f} '
+                    f'{old["queries"]:5d} → {row["queries"]:4d}')
+            problems = []
+            if row['queries'] > old['queries']:
+                problems.append('more queries')
+            if ratio > tolerance:
+                problems.append(f'p95 x{ratio:.2f}')
+            if row['status'] != old['status']:
+                problems.append(f'status {old["status"]} → {row["status"]}')
+            if problems:
+                regressions.append((label, problems))
+                self.stderr.write(f'{line}  ✗ {", ".join(problems)}')
+            else:
+                self.stdout.write(line)
+        return regressions
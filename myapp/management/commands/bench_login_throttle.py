@@ -0,0 +1,101 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import hashers
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from myapp.benchmarks import throwaway_database
+from myapp.models import LoginAttempt, Participant
+from myapp.throttling import login_rates
+
+UNTHROTTLED = {'ip': (10 ** 9, 600), 'identifier': (10 ** 9, 600)}
+
+
+@contextmanager
+def counting_hashes():
+    """Count every password hash computed (checks and make_password both go through encode)."""
+    calls = []
+    hasher = hashers.get_hasher()
+    original = type(hasher).encode
+
+    def encode(self, *args, **kwargs):
+        calls.append(1)
+        return original(self, *args, **kwargs)
+
+    type(hasher).encode = encode
+    try:
+        yield calls
+    finally:
+        type(hasher).encode = original
+
+
+class Command(BaseCommand):
+    help = ('Replay a credential-stuffing burst against the login views on a throwaway test '
+            'database and report how many password hashes it cost')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=400, help='Login POSTs in the replay')
+        parser.add_argument('--ips', type=int, default=2, help='Distinct attacker addresses')
+        parser.add_argument('--identifiers', type=int, default=50, help='Distinct usernames/emails tried')
+        parser.add_argument('--baseline', action='store_true',
+                            help='Also replay with throttling disabled (slow: every attempt hashes)')
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.create_accounts()
+            results = [('throttled', self.replay(options))]
+            if options['baseline']:
+                with override_settings(LOGIN_THROTTLE_RATES=UNTHROTTLED):
+                    results.append(('unthrottled', self.replay(options)))
+
+        for label, (hashes, cpu, wall, statuses) in results:
+            self.stdout.write(f'{label}: {options["attempts"]} attempts -> {hashes} hashes, '
+                              f'{cpu:.2f}s CPU, {wall:.2f}s wall, responses {statuses}')
+
+        hashes = results[0][1][0]
+        rates = login_rates()
+        # AccountBackend hashes exactly once per attempt that gets past the throttle; the
+        # 10% slack covers a replay that straddles a bucket boundary of the approximate window.
+        budget = int(1.1 * min(options['ips'] * rates['ip'][0], options['identifiers'] * rates['identifier'][0]))
+        if hashes > budget:
+            raise CommandError(f'{hashes} hashes exceeds the throttle budget of {budget}')
+        self.stdout.write(self.style.SUCCESS(f'✅ Hashing bounded: {hashes} <= {budget}'))
+
+    def create_accounts(self):
+        password = hashers.make_password('correct horse battery staple')
+        Participant.objects.create(
+            fullname='Bench Volunteer', username='bench-volunteer', email='bench-volunteer@example.com',
+            address='Benchmark', contact_number='bench-0001', password=password,
+        )
+        User.objects.create_user('bench-admin', 'bench-admin@example.com', 'correct horse battery staple',
+                                 is_staff=True)
+
+    def replay(self, options):
+        LoginAttempt.objects.all().delete()
+        identifiers = ['bench-volunteer@example.com', 'bench-admin'] + [
+            f'victim{i}@example.com' for i in range(max(0, options['identifiers'] - 2))
+        ]
+        client = Client()
+        statuses = {}
+        # Every rejected attempt would otherwise log a "Too Many Requests" warning.
+        logger = logging.getLogger('django.request')
+        old_level = logger.level
+        logger.setLevel(logging.ERROR)
+        try:
+            with counting_hashes() as calls:
+                cpu, wall = time.process_time(), time.perf_counter()
+                for i in range(options['attempts']):
+                    response = client.post(
+                        '/login/',
+                        {'identifier': identifiers[i % len(identifiers)], 'password': f'guess-{i}'},
+                        REMOTE_ADDR=f'203.0.113.{i % options["ips"] + 1}',
+                    )
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+        finally:
+            logger.setLevel(old_level)
+        return len(calls), cpu, wall, statuses
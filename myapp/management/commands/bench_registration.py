@@ -0,0 +1,88 @@
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from myapp.benchmarks import throwaway_database
+from myapp.models import CleanupEvent, CleanupRegistration, Participant
+from myapp.registration import register_participant
+
+
+class Command(BaseCommand):
+    help = ('Fire concurrent registrations at a single event in a throwaway database '
+            'and verify it is never overbooked')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participants', type=int, default=300, help='Number of volunteers racing for seats')
+        parser.add_argument('--seats', type=int, default=50, help='max_participants of the benchmark event')
+        parser.add_argument('--workers', type=int, default=32, help='Concurrent threads')
+
+    def handle(self, *args, **options):
+        # Never the live database: the benchmark event would be listed publicly while it runs.
+        with throwaway_database(on_disk=True):
+            self.race(options)
+
+    def race(self, options):
+        tag = uuid.uuid4().hex[:8]
+        seats = options['seats']
+        password = make_password(None)
+
+        event = CleanupEvent.objects.create(
+            name=f'bench-{tag}',
+            place='general',
+            specific_location='Benchmark',
+            date=date.today() + timedelta(days=30),
+            start_time='08:00',
+            duration=1,
+            max_participants=seats,
+        )
+        participants = Participant.objects.bulk_create([
+            Participant(
+                fullname=f'Bench Volunteer {i}',
+                username=f'bench-{tag}-{i}',
+                address='Benchmark',
+                contact_number=f'b{tag}{i}'[:15],
+                password=password,
+                email=f'bench-{tag}-{i}@example.com',
+            )
+            for i in range(options['participants'])
+        ])
+        if not participants[0].pk:
+            participants = list(Participant.objects.filter(username__startswith=f'bench-{tag}-'))
+
+        def attempt(participant):
+            try:
+                # Each volunteer tries twice to also exercise the duplicate path.
+                first = register_participant(participant, event).status.value
+                second = register_participant(participant, event).status.value
+                return first, second
+            except OperationalError as exc:
+                return f'error: {exc}', None
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            outcomes = list(pool.map(attempt, participants))
+        elapsed = time.perf_counter() - started
+
+        first_counts = Counter(first for first, _ in outcomes)
+        second_counts = Counter(second for _, second in outcomes if second)
+        stored = CleanupRegistration.objects.filter(event=event).count()
+
+        self.stdout.write(f'Attempts: {len(participants)} volunteers x2 in {elapsed:.2f}s '
+                          f'({options["workers"]} workers)')
+        self.stdout.write(f'First try:  {dict(first_counts)}')
+        self.stdout.write(f'Second try: {dict(second_counts)}')
+        self.stdout.write(f'Stored registrations: {stored} / {seats} seats')
+
+        if stored > seats:
+            raise CommandError(f'Event overbooked: {stored} registrations for {seats} seats')
+        if first_counts['registered'] != min(seats, len(participants)):
+            raise CommandError('Registered count does not match the number of seats available')
+        self.stdout.write(self.style.SUCCESS('✅ No overbooking'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from myapp.benchmarks import plan_regressions, seed_hot_paths, throwaway_database
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway test database, run the hot views and fail if any of their '
+            'queries falls back to a full table scan (the same check as QueryPlanTests, '
+            'at a size of your choosing)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=3000)
+        parser.add_argument('--participants', type=int, default=5000)
+        parser.add_argument('--registrations', type=int, default=40000)
+        parser.add_argument('--activities', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--show-plans', action='store_true', help='Print the plan of every query')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Plan checks are not implemented for {connection.vendor}')
+
+        with throwaway_database():
+            clients, event_id = seed_hot_paths(
+                events=options['events'], participants=options['participants'],
+                registrations=options['registrations'], activities=options['activities'],
+                seed=options['seed'],
+            )
+            failures = plan_regressions(clients, event_id, log=self.stdout.write, show_plans=options['show_plans'])
+
+        if failures:
+            for label, table, detail in failures:
+                self.stderr.write(f'  {label}: full scan of {table}: {detail}' if table else f'  {label}: {detail}')
+            raise CommandError(f'{len(failures)} query plan regression(s)')
+        self.stdout.write(self.style.SUCCESS('✅ No full table scans on hot paths'))
@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.exports import EVENT_REQUIRED, EXPORTS, FORMATS, buffered, render_lines
+from myapp.models import CleanupEvent
+
+
+class Command(BaseCommand):
+    help = 'Stream an event roster, all registrations or the points ledger to CSV or JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--event', type=int, help='Limit the export to one event (required for roster)')
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', '-o', default='-', help="File to write, or '-' for stdout")
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        event = None
+        if options['event']:
+            event = CleanupEvent.objects.only('id').filter(pk=options['event']).first()
+            if event is None:
+                raise CommandError(f'No event with id {options["event"]}')
+        elif kind in EVENT_REQUIRED:
+            raise CommandError(f'{kind} needs --event')
+
+        export = EXPORTS[kind](event) if event is not None else EXPORTS[kind]()
+        to_stdout = options['output'] == '-'
+        stream = sys.stdout if to_stdout else open(options['output'], 'w', encoding='utf-8', newline='')
+        lines = 0
+        try:
+            for block in buffered(render_lines(export, options['format'])):
+                stream.write(block)
+                lines += block.count('\n')
+        finally:
+            if not to_stdout:
+                stream.close()
+
+        if not to_stdout:
+            self.stdout.write(self.style.SUCCESS(f'✅ Wrote {lines} line(s) to {options["output"]}'))
@@ -0,0 +1,65 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.importing import FORMATS, IMPORTERS, detect_format, open_source, read_rows
+
+
+class Command(BaseCommand):
+    help = ('Stream participants, events or registrations from a CSV or JSONL file, validate every row '
+            'with the site\'s form rules and bulk-insert the valid ones in chunked transactions')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path', help="CSV or JSONL file, or '-' for stdin (needs --format)")
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per validation chunk and transaction')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Password hashing processes (default: one per CPU)')
+        parser.add_argument('--rejects', help='Write rejected rows with their errors to this JSONL file')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; write nothing')
+
+    def handle(self, *args, **options):
+        try:
+            fmt = options['format'] or detect_format(options['path'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        rejects = open(options['rejects'], 'w', encoding='utf-8') if options['rejects'] else None
+        shown = []
+
+        def on_reject(rejection):
+            if rejects:
+                rejects.write(json.dumps({'line': rejection.line, 'errors': rejection.errors,
+                                          'row': rejection.row}, default=str) + '\n')
+            if len(shown) < 10:
+                shown.append(rejection)
+
+        importer = IMPORTERS[options['kind']](
+            batch_size=options['batch_size'], workers=options['workers'],
+            dry_run=options['dry_run'], on_reject=on_reject,
+        )
+        started = time.perf_counter()
+        try:
+            with open_source(options['path']) as stream:
+                result = importer.run(read_rows(stream, fmt), log=lambda message: self.stdout.write(f'  {message}'))
+        except OSError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if rejects:
+                rejects.close()
+        elapsed = time.perf_counter() - started
+
+        for rejection in shown:
+            errors = '; '.join(f'{field}: {" ".join(messages)}' for field, messages in rejection.errors.items())
+            self.stderr.write(f'  line {rejection.line}: {errors}')
+        if result.rejected > len(shown):
+            self.stderr.write(f'  ... and {result.rejected - len(shown)} more'
+                              + (f' (see {options["rejects"]})' if rejects else ''))
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {verb} {result.created} {options["kind"]} of {result.read} row(s) in {elapsed:.1f}s, '
+            f'{result.rejected} rejected'
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from myapp.models import ProofImage
+from myapp.proofs import process_proof
+
+
+class Command(BaseCommand):
+    help = ('Build variants for proof images still pending right here, without waiting for '
+            'run_worker; failures are recorded on the image')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='Also retry images that failed before')
+
+    def handle(self, *args, **options):
+        statuses = [ProofImage.PENDING]
+        if options['retry_failed']:
+            statuses.append(ProofImage.FAILED)
+        ids = list(ProofImage.objects.filter(status__in=statuses).order_by('pk').values_list('pk', flat=True))
+        for proof_id in ids:
+            try:
+                process_proof(proof_id)
+            except Exception as exc:
+                self.stderr.write(f'  proof {proof_id}: {exc}')
+        ready = ProofImage.objects.filter(pk__in=ids, status=ProofImage.READY).count()
+        self.stdout.write(self.style.SUCCESS(f'✅ Processed {len(ids)} proof image(s), {ready} ready'))
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from myapp.throttling import prune_login_attempts
+
+
+class Command(BaseCommand):
+    help = ('Delete old LoginAttempt lockout records. Logins also prune at most once an hour; '
+            'schedule this for quiet sites')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Keep records newer than this (default: LOGIN_ATTEMPT_RETENTION_DAYS)')
+
+    def handle(self, *args, **options):
+        older_than = timedelta(days=options['days']) if options['days'] is not None else None
+        deleted = prune_login_attempts(older_than)
+        self.stdout.write(self.style.SUCCESS(f'✅ Pruned {deleted} login attempt record(s)'))
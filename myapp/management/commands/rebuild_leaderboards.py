@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from myapp.leaderboard import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the global, per-place and per-month leaderboards from the points ledger'
+
+    def handle(self, *args, **options):
+        entries = rebuild_leaderboards()
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt leaderboards with {entries} entries'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from myapp.search import get_search_backend, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Repopulate the full-text search index for cleanup events'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        indexed = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f'✅ {type(backend).__name__}: indexed {indexed} event(s)'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from myapp.models import CleanupEvent
+from myapp.registration import recount_event_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored registered/attended counts of cleanup events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_ids', nargs='*', type=int, help='Only recount these events')
+
+    def handle(self, *args, **options):
+        events = CleanupEvent.objects.all()
+        if options['event_ids']:
+            events = events.filter(pk__in=options['event_ids'])
+        updated = recount_event_counters(events)
+        self.stdout.write(self.style.SUCCESS(f'✅ Recounted {updated} event(s)'))
@@ -0,0 +1,80 @@
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from myapp.jobs import claim, prune_jobs, run
+
+
+def _run_and_close(entry):
+    try:
+        return run(entry)
+    finally:
+        # Pool threads each hold their own connection; do not leak them.
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = ('Run queued background jobs from the database. Start one or more of these next to the web '
+            'process; jobs locked by a worker that dies are picked up again once their lock expires')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=getattr(settings, 'JOBS_WORKER_THREADS', 2),
+                            help='Jobs run at the same time by this worker')
+        parser.add_argument('--poll', type=float, default=getattr(settings, 'JOBS_POLL_INTERVAL', 1.0),
+                            help='Seconds to wait between polls when the queue is empty')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due instead of waiting')
+
+    def handle(self, *args, **options):
+        threads = max(1, options['threads'])
+        name = f'{socket.gethostname()}-{os.getpid()}'
+        stopping = threading.Event()
+
+        def stop(signum, frame):
+            self.stdout.write('Finishing running jobs, then stopping...')
+            stopping.set()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        prune_interval = 60 * 60
+        next_prune = time.monotonic()
+        counts = {True: 0, False: 0}
+        running = set()
+
+        def collect(futures):
+            for future in futures:
+                # run() records job errors itself; anything raised here is the queue's own failure.
+                counts[future.exception() is None and future.result()] += 1
+
+        self.stdout.write(f'Worker {name} running {threads} thread(s)')
+
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='jobs') as pool:
+            while not stopping.is_set():
+                close_old_connections()
+                if time.monotonic() >= next_prune:
+                    prune_jobs()
+                    next_prune = time.monotonic() + prune_interval
+
+                free = threads - len(running)
+                claimed = claim(name, limit=free) if free else []
+                running.update(pool.submit(_run_and_close, entry) for entry in claimed)
+
+                if not running:
+                    if options['burst']:
+                        break
+                    stopping.wait(options['poll'])
+                    continue
+                finished, running = wait(running, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                collect(finished)
+            collect(wait(running).done)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Worker {name} stopped after {counts[True]} job(s), {counts[False]} failed'
+        ))
@@ -1,12 +1,33 @@
-from django.core.management.base import BaseCommand
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
 from myapp.models import Participant, CleanupEvent
+from myapp.seeding import seed_dataset
 from datetime import datetime, timedelta
 
+# What --scale 1 adds; every count is multiplied by the scale, so --scale 100
+# is a million registrations.
+SCALE_UNIT = {'events': 200, 'participants': 1000, 'registrations': 10000, 'activities': 2000}
+
 class Command(BaseCommand):
     help = 'Setup initial data for EcoBayanihan'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=0,
+                            help='Also generate a realistic dataset of this many units (1 unit = '
+                                 '200 events, 1,000 volunteers, 10,000 registrations, 2,000 manual awards)')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed for --scale; the same seed always generates the same data')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
     def handle(self, *args, **options):
+        if options['scale'] < 0:
+            raise CommandError('--scale must not be negative')
+        prefix = f's{options["seed"]}'
+        if options['scale'] and Participant.objects.filter(username__startswith=f'{prefix}_vol').exists():
+            raise CommandError(f'Data for --seed {options["seed"]} already exists; pick another seed')
+
         # Create superuser
         if not User.objects.filter(username='admin').exists():
             User.objects.create_superuser('admin', 'admin@ecobayanihan.com', 'admin123')
@@ -41,6 +62,36 @@ class Command(BaseCommand):
             )
             self.stdout.write('✅ Sample event created: Beach Cleanup Drive')
 
+        if options['scale']:
+            self.generate(options, prefix)
+
         self.stdout.write('🌿 Setup complete! You can now login.')
         self.stdout.write('Admin: admin/admin123')
-        self.stdout.write('Participant: test@example.com/test123')
\ No newline at end of file
+        self.stdout.write('Participant: test@example.com/test123')
+
+    def generate(self, options, prefix):
+        counts = {key: unit * options['scale'] for key, unit in SCALE_UNIT.items()}
+        self.stdout.write(
+            f'Generating {counts["events"]:,} events, {counts["participants"]:,} volunteers and '
+            f'{counts["registrations"]:,} registrations (seed {options["seed"]})...'
+        )
+        started = time.perf_counter()
+        log_every = max(counts['registrations'] // 10, options['batch_size'])
+
+        def log(message):
+            label, _, count = message.partition(': ')
+            # Registrations are reported every batch; roughly every tenth of the way is enough here.
+            if label == 'registrations' and options['verbosity'] < 2:
+                count = int(count)
+                if count % log_every >= options['batch_size'] and count != counts['registrations']:
+                    return
+            self.stdout.write(f'  {time.perf_counter() - started:6.1f}s  {message}')
+
+        made = seed_dataset(**counts, seed=options['seed'], batch_size=options['batch_size'],
+                            prefix=prefix, log=log)
+        self.stdout.write(
+            f'✅ Generated {made["events"]:,} events, {made["participants"]:,} volunteers, '
+            f'{made["registrations"]:,} registrations and {made["activities"]:,} manual awards '
+            f'in {time.perf_counter() - started:.0f}s'
+        )
+        self.stdout.write(f'Generated volunteers log in as {prefix}.vol<N>@example.com / volunteer123')
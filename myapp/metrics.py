@@ -0,0 +1,191 @@
+import math
+import os
+import socket
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+
+METRICS_CACHE_PREFIX = 'metrics'
+WORKERS_KEY = f'{METRICS_CACHE_PREFIX}:workers'
+
+# Upper bounds; the last bucket is +Inf.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, math.inf)
+
+
+def sample_rate():
+    return getattr(settings, 'METRICS_SAMPLE_RATE', 1.0)
+
+
+def flush_interval():
+    return getattr(settings, 'METRICS_FLUSH_INTERVAL', 10)
+
+
+def worker_ttl():
+    return getattr(settings, 'METRICS_WORKER_TTL', 60 * 60 * 24)
+
+
+@dataclass
+class ViewStats:
+    """Running totals for one (view, method, status class)."""
+    count: int = 0
+    seconds: float = 0.0
+    queries: int = 0
+    sql_seconds: float = 0.0
+    response_bytes: int = 0
+    latency_buckets: list = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+    query_buckets: list = field(default_factory=lambda: [0] * len(QUERY_BUCKETS))
+
+    def add(self, seconds, queries, sql_seconds, response_bytes):
+        self.count += 1
+        self.seconds += seconds
+        self.queries += queries
+        self.sql_seconds += sql_seconds
+        self.response_bytes += response_bytes
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.query_buckets[bisect_left(QUERY_BUCKETS, queries)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.seconds += other.seconds
+        self.queries += other.queries
+        self.sql_seconds += other.sql_seconds
+        self.response_bytes += other.response_bytes
+        self.latency_buckets = [a + b for a, b in zip(self.latency_buckets, other.latency_buckets)]
+        self.query_buckets = [a + b for a, b in zip(self.query_buckets, other.query_buckets)]
+
+    def quantile(self, q):
+        """Upper bound of the latency bucket holding the q-th request; an estimate, like Prometheus's."""
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS, self.latency_buckets):
+            seen += n
+            if seen >= rank and n:
+                return bound
+        return 0.0
+
+
+class SqlCounter:
+    """A ``connection.execute_wrapper`` that counts queries and the time spent in them."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+class MetricsRegistry:
+    """
+    This process's totals, keyed by (view, method, status class).
+
+    Every ``flush_interval()`` seconds the whole snapshot is written to the
+    shared cache under this worker's key, so any worker can report the sum
+    over all of them without a lock or a round trip per request.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.worker_id = f'{socket.gethostname()}-{self.pid}-{uuid.uuid4().hex[:6]}'
+        self.stats = {}
+        self.next_flush = time.monotonic() + flush_interval()
+
+    def record(self, key, seconds, queries, sql_seconds, response_bytes):
+        if self.pid != os.getpid():
+            # Forked after import (gunicorn --preload): start this worker's own totals.
+            self._reset()
+        with self.lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = ViewStats()
+            stats.add(seconds, queries, sql_seconds, response_bytes)
+        if time.monotonic() >= self.next_flush:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {key: ViewStats(s.count, s.seconds, s.queries, s.sql_seconds, s.response_bytes,
+                                   list(s.latency_buckets), list(s.query_buckets))
+                    for key, s in self.stats.items()}
+
+    def flush(self):
+        self.next_flush = time.monotonic() + flush_interval()
+        cache.set(f'{METRICS_CACHE_PREFIX}:worker:{self.worker_id}', self.snapshot(), worker_ttl())
+        workers = cache.get(WORKERS_KEY) or set()
+        if self.worker_id not in workers:
+            # Two workers adding themselves at once can lose one; it re-adds on its next flush.
+            cache.set(WORKERS_KEY, workers | {self.worker_id}, worker_ttl())
+
+
+registry = MetricsRegistry()
+
+
+def collect():
+    """Totals over every worker that flushed recently, this one included."""
+    registry.flush()
+    workers = cache.get(WORKERS_KEY) or set()
+    snapshots = cache.get_many([f'{METRICS_CACHE_PREFIX}:worker:{worker}' for worker in workers])
+    live = {key.rsplit(':', 1)[1] for key in snapshots}
+    if live != workers:
+        # Forget workers whose snapshots expired (restarted or scaled down).
+        cache.set(WORKERS_KEY, live | {registry.worker_id}, worker_ttl())
+    totals = {}
+    for snapshot in snapshots.values():
+        for key, stats in snapshot.items():
+            totals.setdefault(key, ViewStats()).merge(stats)
+    return totals
+
+
+def _labels(view, method, status):
+    return f'view="{view}",method="{method}",status="{status}"'
+
+
+def _bound(value):
+    return '+Inf' if value == math.inf else repr(value)
+
+
+def prometheus_text(totals):
+    """Render ``collect()`` output in the Prometheus text exposition format."""
+    lines = [
+        '# HELP eco_metrics_sample_rate Fraction of requests that are measured.',
+        '# TYPE eco_metrics_sample_rate gauge',
+        f'eco_metrics_sample_rate {sample_rate()}',
+    ]
+    families = [
+        ('eco_request_duration_seconds', 'Time to produce the response, by view.', 'latency_buckets',
+         LATENCY_BUCKETS, 'seconds'),
+        ('eco_request_queries', 'SQL queries per request, by view.', 'query_buckets', QUERY_BUCKETS, 'queries'),
+    ]
+    for name, help_text, buckets_attr, bounds, sum_attr in families:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for key, stats in sorted(totals.items()):
+            labels = _labels(*key)
+            cumulative = 0
+            for bound, n in zip(bounds, getattr(stats, buckets_attr)):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{labels},le="{_bound(bound)}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{labels}}} {getattr(stats, sum_attr)}')
+            lines.append(f'{name}_count{{{labels}}} {stats.count}')
+    counters = [
+        ('eco_request_sql_seconds_total', 'Time spent in SQL, by view.', 'sql_seconds'),
+        ('eco_response_bytes_total', 'Response body bytes (streamed bodies excluded), by view.', 'response_bytes'),
+    ]
+    for name, help_text, attr in counters:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        lines += [f'{name}{{{_labels(*key)}}} {getattr(stats, attr)}' for key, stats in sorted(totals.items())]
+    return '\n'.join(lines) + '\n'
@@ -1,34 +1,107 @@
 from django.utils import timezone
 from django.shortcuts import redirect
 from django.conf import settings
+from django.db import connection
+from django.utils.functional import SimpleLazyObject
+import random
 import time
 
+from .metrics import SqlCounter, registry, sample_rate
+from .participants import get_participant
+
+# Views behind the idle timeout, by URL name; Django's own admin is covered by its namespace.
+ADMIN_VIEW_NAMES = frozenset(f'myapp:{name}' for name in (
+    'custom_admin_panel', 'event_participants', 'bulk_approve', 'approve_registration', 'export_data',
+    'metrics_dashboard', 'add_event', 'edit_event', 'delete_event', 'add_participant', 'edit_participant',
+    'delete_participant', 'give_points',
+))
+ADMIN_ACTIVITY_KEY = 'admin_last_activity'
+
+
+def admin_session_timeout():
+    return getattr(settings, 'ADMIN_SESSION_TIMEOUT', 300)
+
+
+def admin_activity_granularity():
+    return getattr(settings, 'ADMIN_ACTIVITY_GRANULARITY', 60)
+
+
 class AdminSessionTimeoutMiddleware:
+    """
+    Log staff out of the admin pages after ADMIN_SESSION_TIMEOUT idle seconds.
+
+    The last-activity stamp is only saved once it is ADMIN_ACTIVITY_GRANULARITY
+    seconds old, so a burst of admin clicks costs one session write rather than
+    one each; in exchange a session may expire up to that much early.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        # Check if user is accessing admin pages
-        admin_paths = ['/admin/', 'custom_admin_panel', 'admin_add_edit', 'give_points', 'confirm_delete']
-        is_admin_path = any(path in request.path for path in admin_paths)
-        
-        if is_admin_path and request.user.is_authenticated and request.user.is_staff:
-            # Get last activity time from session
-            last_activity = request.session.get('admin_last_activity')
-            current_time = time.time()
-            
-            # If no activity recorded, set it now
-            if not last_activity:
-                request.session['admin_last_activity'] = current_time
-            else:
-                # Check if 5 minutes (300 seconds) have passed
-                if current_time - last_activity > 300:
-                    # Clear the session and redirect to login
-                    request.session.flush()
-                    return redirect('myapp:admin_login')
-                else:
-                    # Update last activity time
-                    request.session['admin_last_activity'] = current_time
-        
-        response = self.get_response(request)
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        if match.view_name not in ADMIN_VIEW_NAMES and match.app_name != 'admin':
+            return None
+        if not (request.user.is_authenticated and request.user.is_staff):
+            return None
+
+        now = int(time.time())
+        last_activity = request.session.get(ADMIN_ACTIVITY_KEY)
+        if last_activity and now - last_activity > admin_session_timeout():
+            request.session.flush()
+            return redirect('myapp:admin_login')
+        if not last_activity or now - last_activity >= admin_activity_granularity():
+            request.session[ADMIN_ACTIVITY_KEY] = now
+        return None
+
+
+class ParticipantMiddleware:
+    """
+    Expose the logged-in volunteer as ``request.participant``, loaded on first use.
+
+    Like ``request.user`` it is a lazy proxy, so test it for truth rather than
+    against None: it is falsy when no volunteer is logged in.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.participant = SimpleLazyObject(lambda: get_participant(request))
+        return self.get_response(request)
+
+
+class MetricsMiddleware:
+    """
+    Time each sampled request and count its SQL, per resolved view.
+
+    Unsampled requests (METRICS_SAMPLE_RATE < 1) pass straight through, so
+    turning the rate down makes the cost one random() call. Time is measured
+    up to the response object; the body of a streamed response is not timed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = sample_rate()
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        counter = SqlCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        size = 0 if response.streaming else len(response.content)
+        registry.record(
+            (view, request.method, f'{response.status_code // 100}xx'),
+            elapsed, counter.queries, counter.seconds, size,
+        )
         return response
@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-18 14:17
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    CleanupEvent = apps.get_model('myapp', 'CleanupEvent')
+    CleanupRegistration = apps.get_model('myapp', 'CleanupRegistration')
+
+    counts = (
+        CleanupRegistration.objects.filter(event=OuterRef('pk'))
+        .order_by()
+        .values('event')
+    )
+    CleanupEvent.objects.update(
+        registered_count=Coalesce(Subquery(counts.annotate(n=Count('pk')).values('n')), 0),
+        attended_count=Coalesce(Subquery(counts.annotate(n=Count('pk', filter=Q(attended=True))).values('n')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0006_loginattempt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cleanupevent',
+            name='attended_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cleanupevent',
+            name='registered_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
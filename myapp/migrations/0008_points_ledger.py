@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-18 14:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_ledger(apps, schema_editor):
+    Participant = apps.get_model('myapp', 'Participant')
+    Activity = apps.get_model('myapp', 'Activity')
+
+    adjustments = []
+    for participant in Participant.objects.only('id', 'points').iterator(chunk_size=500):
+        balance = 0
+        rows = list(Activity.objects.filter(participant_id=participant.id).order_by('date_participated', 'id'))
+        for row in rows:
+            balance += row.points_earned
+            row.balance_after = balance
+        Activity.objects.bulk_update(rows, ['balance_after'], batch_size=500)
+
+        # Points given before the ledger existed were never logged; record the
+        # difference once so the ledger agrees with the stored balance.
+        if participant.points != balance:
+            adjustments.append(Activity(
+                participant_id=participant.id,
+                points_earned=participant.points - balance,
+                balance_after=participant.points,
+                description='Opening balance',
+            ))
+    Activity.objects.bulk_create(adjustments, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('myapp', '0007_cleanupevent_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='awarded_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='awarded_activities', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='balance_after',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['participant', 'date_participated', 'id'], name='activity_ledger_idx'),
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
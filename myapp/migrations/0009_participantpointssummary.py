@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-18 14:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_points_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticipantPointsSummary',
+            fields=[
+                ('participant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='points_summary', serialize=False, to='myapp.participant')),
+                ('total_awarded', models.IntegerField(default=0)),
+                ('pending_count', models.IntegerField(default=0)),
+                ('last_awarded_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
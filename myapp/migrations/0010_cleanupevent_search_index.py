@@ -0,0 +1,63 @@
+from django.db import migrations
+
+SQLITE_FORWARDS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS myapp_cleanupevent_fts USING fts5("
+    "name, place, specific_location, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "INSERT INTO myapp_cleanupevent_fts (rowid, name, place, specific_location) "
+    "SELECT id, name, place, specific_location FROM myapp_cleanupevent",
+    "CREATE TRIGGER myapp_cleanupevent_fts_ai AFTER INSERT ON myapp_cleanupevent BEGIN "
+    "INSERT INTO myapp_cleanupevent_fts (rowid, name, place, specific_location) "
+    "VALUES (new.id, new.name, new.place, new.specific_location); END",
+    "CREATE TRIGGER myapp_cleanupevent_fts_ad AFTER DELETE ON myapp_cleanupevent BEGIN "
+    "DELETE FROM myapp_cleanupevent_fts WHERE rowid = old.id; END",
+    # Only text edits touch the index; counter updates on the event row do not.
+    "CREATE TRIGGER myapp_cleanupevent_fts_au AFTER UPDATE OF name, place, specific_location "
+    "ON myapp_cleanupevent BEGIN "
+    "UPDATE myapp_cleanupevent_fts SET name = new.name, place = new.place, "
+    "specific_location = new.specific_location WHERE rowid = old.id; END",
+]
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS myapp_cleanupevent_fts_ai",
+    "DROP TRIGGER IF EXISTS myapp_cleanupevent_fts_ad",
+    "DROP TRIGGER IF EXISTS myapp_cleanupevent_fts_au",
+    "DROP TABLE IF EXISTS myapp_cleanupevent_fts",
+]
+
+POSTGRES_FORWARDS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE myapp_cleanupevent ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(specific_location, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(place, '')), 'C')) STORED",
+    "CREATE INDEX myapp_cleanupevent_search_idx ON myapp_cleanupevent USING GIN (search_vector)",
+    "CREATE INDEX myapp_cleanupevent_name_trgm ON myapp_cleanupevent USING GIN (name gin_trgm_ops)",
+    "CREATE INDEX myapp_cleanupevent_location_trgm ON myapp_cleanupevent "
+    "USING GIN (specific_location gin_trgm_ops)",
+]
+POSTGRES_BACKWARDS = [
+    "DROP INDEX IF EXISTS myapp_cleanupevent_location_trgm",
+    "DROP INDEX IF EXISTS myapp_cleanupevent_name_trgm",
+    "DROP INDEX IF EXISTS myapp_cleanupevent_search_idx",
+    "ALTER TABLE myapp_cleanupevent DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_participantpointssummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARDS, 'postgresql': POSTGRES_FORWARDS}),
+            _run({'sqlite': SQLITE_BACKWARDS, 'postgresql': POSTGRES_BACKWARDS}),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-18 14:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_cleanupevent_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cleanupevent',
+            index=models.Index(fields=['date', 'start_time'], name='event_date_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cleanupevent',
+            index=models.Index(fields=['date', 'id'], name='event_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cleanupevent',
+            index=models.Index(fields=['place', 'date', 'id'], name='event_place_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cleanupregistration',
+            index=models.Index(fields=['participant', 'attended'], name='registration_attended_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cleanupregistration',
+            index=models.Index(fields=['participant', 'registered_at', 'id'], name='registration_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cleanupregistration',
+            index=models.Index(fields=['event', 'registered_at'], name='registration_event_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['registered_at', 'id'], name='participant_registered_idx'),
+        ),
+    ]
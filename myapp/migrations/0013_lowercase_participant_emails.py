@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-18 16:02
+
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def lowercase_emails(apps, schema_editor):
+    Participant = apps.get_model('myapp', 'Participant')
+    taken = set(Participant.objects.values_list('email', flat=True))
+    for participant in Participant.objects.exclude(email=Lower('email')).only('email'):
+        email = participant.email.strip().lower()
+        # Leave case-only duplicates alone rather than break the unique index.
+        if email in taken:
+            continue
+        taken.add(email)
+        Participant.objects.filter(pk=participant.pk).update(email=email)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0012_leaderboards'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 14:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0013_lowercase_participant_emails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProofImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('original', models.FileField(blank=True, upload_to='proofs/')),
+                ('display', models.FileField(blank=True, upload_to='proofs/')),
+                ('thumbnail', models.FileField(blank=True, upload_to='proofs/')),
+                ('width', models.PositiveIntegerField(blank=True, null=True)),
+                ('height', models.PositiveIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='cleanupregistration',
+            name='proof',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='registrations', to='myapp.proofimage'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 15:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0016_notification'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activity',
+            name='event',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='myapp.cleanupevent'),
+        ),
+    ]
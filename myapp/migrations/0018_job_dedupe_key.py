@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0017_activity_event_set_null'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='dedupe_key',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+    ]
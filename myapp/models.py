@@ -20,6 +20,9 @@ class CleanupEvent(models.Model):
     duration = models.IntegerField(help_text='Duration in hours')
     points = models.IntegerField(default=10)
     max_participants = models.IntegerField(default=20)
+    # Denormalized counters, kept in step with CleanupRegistration writes.
+    registered_count = models.PositiveIntegerField(default=0, editable=False)
+    attended_count = models.PositiveIntegerField(default=0, editable=False)
     description = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
     is_completed = models.BooleanField(default=False)
@@ -28,6 +31,25 @@ class CleanupEvent(models.Model):
 
     class Meta:
         ordering = ['-date', '-start_time']
+        indexes = [
+            # Day buckets and the (-date, -start_time) default ordering
+            models.Index(fields=['date', 'start_time'], name='event_date_time_idx'),
+            # Seek pagination on (date, id), optionally within one place
+            models.Index(fields=['date', 'id'], name='event_date_id_idx'),
+            models.Index(fields=['place', 'date', 'id'], name='event_place_date_idx'),
+        ]
+
+    COUNTER_FIELDS = ('registered_count', 'attended_count')
+
+    def save(self, *args, **kwargs):
+        # The counters are only ever moved with F() updates; a full save from a
+        # stale instance must not write them back.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name} ({self.date})"
@@ -46,6 +68,12 @@ class Participant(models.Model):
     event = models.ForeignKey(CleanupEvent, on_delete=models.CASCADE, related_name='participants', null=True,
     blank=True)  # ✅ allow blank in forms
 
+    def save(self, *args, **kwargs):
+        # Logins look emails up with an exact, indexed match.
+        if self.email:
+            self.email = self.email.strip().lower()
+        super().save(*args, **kwargs)
+
     def set_password(self, raw_password):
         self.password = make_password(raw_password)
 
@@ -57,9 +85,43 @@ class Participant(models.Model):
 
     class Meta:
         ordering = ['-registered_at']
+        indexes = [
+            models.Index(fields=['registered_at', 'id'], name='participant_registered_idx'),
+        ]
+
 
 
 
+class ProofImage(models.Model):
+    """
+    An uploaded proof photo, stored once per distinct content.
+
+    Uploads land in proofs/incoming/ and are turned into an EXIF-free original
+    plus WebP display and thumbnail variants by myapp.proofs, off the request.
+    """
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (READY, 'Ready'),
+        (FAILED, 'Failed'),
+    ]
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    original = models.FileField(upload_to='proofs/', blank=True)
+    display = models.FileField(upload_to='proofs/', blank=True)
+    thumbnail = models.FileField(upload_to='proofs/', blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.status})"
+
 
 class CleanupRegistration(models.Model):
     participant = models.ForeignKey(Participant, on_delete=models.CASCADE)
@@ -68,6 +130,7 @@ class CleanupRegistration(models.Model):
     attended = models.BooleanField(default=False)
     points_awarded = models.BooleanField(default=False)
     proof_image = models.ImageField(upload_to='proofs/', null=True, blank=True)
+    proof = models.ForeignKey(ProofImage, null=True, blank=True, on_delete=models.SET_NULL, related_name='registrations')
     proof_notes = models.TextField(blank=True)
     approved = models.BooleanField(default=False)
     approved_at = models.DateTimeField(null=True, blank=True)
@@ -79,19 +142,80 @@ class CleanupRegistration(models.Model):
     class Meta:
         ordering = ['-registered_at']
         unique_together = (('participant', 'event'),)
+        indexes = [
+            models.Index(fields=['participant', 'attended'], name='registration_attended_idx'),
+            models.Index(fields=['participant', 'registered_at', 'id'], name='registration_history_idx'),
+            models.Index(fields=['event', 'registered_at'], name='registration_event_idx'),
+        ]
 
     def __str__(self):
         return f"{self.participant.fullname} -> {self.event.name}"
 
 
+class ParticipantPointsSummary(models.Model):
+    """Per-participant totals for points_history, refreshed when registrations change."""
+    participant = models.OneToOneField(
+        Participant, on_delete=models.CASCADE, primary_key=True, related_name='points_summary'
+    )
+    total_awarded = models.IntegerField(default=0)
+    pending_count = models.IntegerField(default=0)
+    last_awarded_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.participant_id}: {self.total_awarded} pts"
+
+
+class LeaderboardEntry(models.Model):
+    """A participant's score on one board ('global', 'place:beach', 'month:2025-11', ...)."""
+    board = models.CharField(max_length=32)
+    participant = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    score = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = (('board', 'participant'),)
+        indexes = [
+            models.Index(fields=['board', 'score', 'participant'], name='leaderboard_top_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.board}: {self.participant_id} = {self.score}"
+
+
+class LeaderboardNode(models.Model):
+    """One Fenwick-tree cell counting how many entries of a board fall in a score range."""
+    board = models.CharField(max_length=32)
+    node = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = (('board', 'node'),)
+
+    def __str__(self):
+        return f"{self.board}[{self.node}] = {self.count}"
+
+
 class Activity(models.Model):
     CLEANUP_TYPES = CleanupEvent.PLACE_CHOICES
     participant = models.ForeignKey(Participant, on_delete=models.CASCADE)
-    event = models.ForeignKey(CleanupEvent, on_delete=models.CASCADE, null=True, blank=True)
+    # The ledger outlives the event: deleting one must not take back points already credited.
+    event = models.ForeignKey(CleanupEvent, on_delete=models.SET_NULL, null=True, blank=True)
     cleanup_type = models.CharField(max_length=20, choices=CLEANUP_TYPES, default='general')
     points_earned = models.IntegerField(default=10)
     date_participated = models.DateTimeField(auto_now_add=True)
     description = models.TextField(blank=True)
+    # Points ledger: rows are only ever inserted (see myapp.points.award_points),
+    # and each one records the participant's balance right after it was applied.
+    balance_after = models.IntegerField(null=True, blank=True, editable=False)
+    awarded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True,
+        on_delete=models.SET_NULL, related_name='awarded_activities'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['participant', 'date_participated', 'id'], name='activity_ledger_idx'),
+        ]
 
     def __str__(self):
         return f"{self.participant.fullname} +{self.points_earned} pts"
@@ -116,3 +240,78 @@ class LoginAttempt(models.Model):
                 self.save()
                 return False
         return False
+
+
+class Job(models.Model):
+    """
+    A unit of work queued by a request and run later by ``manage.py run_worker``.
+
+    A worker claims a job by moving it to RUNNING with ``locked_until`` set; if
+    the worker dies, the lock expires and another worker picks the job up again.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=200, help_text='Dotted path of the job function')
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=64, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Set by enqueue_periodically(); the unique constraint lets one caller per interval win.
+    dedupe_key = models.CharField(max_length=255, null=True, blank=True, unique=True)
+
+    class Meta:
+        indexes = [
+            # Claiming: due queued jobs, and running jobs whose lock has expired
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+            models.Index(fields=['status', 'locked_until'], name='job_status_locked_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class Notification(models.Model):
+    """
+    Something to tell a volunteer the next time they open a volunteer page.
+
+    The payload only holds what is not already in a row the notification
+    points at (the event's details come from ``event``), so rows stay small.
+    """
+    REGISTERED = 'registered'
+    POINTS = 'points'
+    KIND_CHOICES = [
+        (REGISTERED, 'Registered for an event'),
+        (POINTS, 'Points added'),
+    ]
+
+    participant = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    event = models.ForeignKey(CleanupEvent, null=True, blank=True, on_delete=models.CASCADE)
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The inbox read: one participant's unread rows, oldest first
+            models.Index(fields=['participant', 'read_at', 'id'], name='notification_inbox_idx'),
+            models.Index(fields=['created_at'], name='notification_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.participant_id}"
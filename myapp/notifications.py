@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .jobs import enqueue_periodically, job
+from .models import Notification
+
+
+def inbox_limit():
+    return getattr(settings, 'NOTIFICATION_INBOX_LIMIT', 20)
+
+
+def notify(participant, kind, event=None, **payload):
+    """Queue a notification for ``participant``; it is written in the caller's transaction."""
+    notification = Notification.objects.create(
+        participant_id=getattr(participant, 'pk', participant), kind=kind, event=event, payload=payload,
+    )
+    prune_notifications_periodically()
+    return notification
+
+
+def take_unread(participant):
+    """
+    The participant's unread notifications, oldest first, marked read.
+
+    One indexed SELECT, plus one UPDATE only when there was something to show.
+    """
+    unread = list(
+        Notification.objects.filter(participant=participant, read_at__isnull=True)
+        .select_related('event').order_by('id')[:inbox_limit()]
+    )
+    if unread:
+        Notification.objects.filter(pk__in=[n.pk for n in unread]).update(read_at=timezone.now())
+    return unread
+
+
+def registration_details(event):
+    """What the select_event success modal shows about ``event``."""
+    return {
+        'event_name': event.name,
+        'event_place': event.place,
+        'event_specific_location': event.specific_location,
+        'event_date': event.date.strftime("%B %d, %Y"),
+        'event_start_time': event.start_time.strftime("%I:%M %p"),
+        'event_duration': event.duration,
+        'event_points': event.points,
+    }
+
+
+@job(max_attempts=1)
+def prune_notifications(older_than=None):
+    """Delete notifications older than NOTIFICATION_RETENTION_DAYS; returns the number removed."""
+    if older_than is None:
+        older_than = timedelta(days=getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 30))
+    deleted, _ = Notification.objects.filter(created_at__lt=timezone.now() - older_than).delete()
+    return deleted
+
+
+def prune_notifications_periodically():
+    return enqueue_periodically(prune_notifications, getattr(settings, 'NOTIFICATION_PRUNE_INTERVAL', 60 * 60))
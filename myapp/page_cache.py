@@ -0,0 +1,140 @@
+import gzip
+import hashlib
+import re
+import time
+from datetime import date
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import urlencode
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip variants are stored.
+    brotli = None
+
+PAGE_CACHE_PREFIX = 'page_cache'
+# Bodies smaller than this are not worth a compressed copy.
+MIN_COMPRESS_LENGTH = 200
+
+_accepts_br = re.compile(r'\bbr\b')
+_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+def page_cache_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _generation_key(group):
+    return f'{PAGE_CACHE_PREFIX}:gen:{group}'
+
+
+def invalidate_pages(group):
+    """Drop every cached page that depends on ``group``, once the current transaction commits."""
+    # A fresh value rather than incr(): nothing to race on, and old pages simply stop being read.
+    transaction.on_commit(lambda: cache.set(_generation_key(group), time.time_ns(), None))
+
+
+def _page_key(view_name, groups, params, request):
+    generations = cache.get_many([_generation_key(group) for group in groups])
+    versions = ':'.join(str(generations.get(_generation_key(group), 0)) for group in groups)
+    # Only the parameters the view reads, in a fixed order, so ?b=1&a=2 and ?a=2&b=1 share a page.
+    query = urlencode([(name, request.GET.getlist(name)) for name in params if name in request.GET], doseq=True)
+    path = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    # The date is part of the key because the pages bucket events relative to today.
+    return f'{PAGE_CACHE_PREFIX}:{view_name}:{versions}:{date.today().isoformat()}:{path}'
+
+
+def _is_anonymous(request):
+    # Judged from the cookies alone so a hit never loads the session or the user.
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def _is_cacheable(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        and 'Content-Encoding' not in response
+        and 'private' not in response.get('Cache-Control', '')
+    )
+
+
+def _compressed_variants(body):
+    variants = {'identity': body}
+    if len(body) >= MIN_COMPRESS_LENGTH:
+        variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            variants['br'] = brotli.compress(body, mode=brotli.MODE_TEXT)
+    return variants
+
+
+def _pick_encoding(request, entry):
+    accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if 'br' in entry['bodies'] and _accepts_br.search(accepted):
+        return 'br'
+    if 'gzip' in entry['bodies'] and _accepts_gzip.search(accepted):
+        return 'gzip'
+    return 'identity'
+
+
+def _respond(request, entry):
+    if request.META.get('HTTP_IF_NONE_MATCH') == entry['etag']:
+        response = HttpResponseNotModified()
+        response['ETag'] = entry['etag']
+        return response
+    encoding = _pick_encoding(request, entry)
+    response = HttpResponse(entry['bodies'][encoding], content_type=entry['content_type'])
+    if encoding != 'identity':
+        response['Content-Encoding'] = encoding
+    response['Content-Length'] = str(len(entry['bodies'][encoding]))
+    response['ETag'] = entry['etag']
+    patch_vary_headers(response, ('Accept-Encoding', 'Cookie'))
+    return response
+
+
+def cache_public_page(*groups, params=()):
+    """
+    Serve anonymous GETs of the decorated view from a shared full-page cache.
+
+    Pages are keyed by view, path and the query ``params`` the view reads; a
+    request carrying any other parameter (``?utm_source=``, ``?junk=1``) is
+    served uncached, so made-up query strings cannot fill the cache. Pages
+    are stored with gzip (and,
+    when the ``brotli`` package is installed, brotli) copies made once at
+    store time. ``groups`` name what the page is built from; calling
+    ``invalidate_pages(group)`` drops every page of that group at once.
+    A hit touches neither the database nor the template engine.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _is_anonymous(request) or any(name not in params for name in request.GET):
+                return view(request, *args, **kwargs)
+            key = _page_key(view.__name__, groups, params, request)
+            entry = cache.get(key)
+            if entry is not None:
+                return _respond(request, entry)
+
+            response = view(request, *args, **kwargs)
+            if not _is_cacheable(request, response):
+                return response
+            entry = {
+                'content_type': response['Content-Type'],
+                'etag': f'W/"{hashlib.md5(response.content).hexdigest()}"',
+                'bodies': _compressed_variants(response.content),
+            }
+            cache.set(key, entry, page_cache_timeout())
+            return _respond(request, entry)
+        return wrapper
+    return decorator
@@ -0,0 +1,96 @@
+import base64
+import json
+from dataclasses import dataclass, field
+
+from django.db.models import Q
+from django.urls import reverse
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: str = None
+    has_next: bool = False
+    ordering: tuple = field(default_factory=tuple)
+
+
+def encode_cursor(values):
+    raw = json.dumps([str(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_raw_cursor(token):
+    """Return the list of strings inside a cursor token, or None if it is malformed."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(raw, list):
+        return None
+    return raw
+
+
+def decode_cursor(token, model, ordering):
+    """Turn a cursor token back into typed values, or None if it is malformed."""
+    raw = decode_raw_cursor(token)
+    if raw is None or len(raw) != len(ordering):
+        return None
+
+    values = []
+    for name, value in zip(ordering, raw):
+        model_field = model._meta.get_field(name.lstrip('-'))
+        try:
+            values.append(model_field.to_python(value))
+        except Exception:
+            return None
+    return values
+
+
+def _seek_filter(ordering, values):
+    # (a, b) > (va, vb)  ==>  a > va OR (a = va AND b > vb), direction per field
+    condition = Q()
+    for i, name in enumerate(ordering):
+        column = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        clause = Q(**{f'{column}__{lookup}': values[i]})
+        for prev_name, prev_value in zip(ordering[:i], values[:i]):
+            clause &= Q(**{prev_name.lstrip('-'): prev_value})
+        condition |= clause
+    return condition
+
+
+def keyset_paginate(queryset, ordering, cursor=None, per_page=25):
+    """
+    Seek pagination over ``ordering`` (which must end in a unique column).
+    Each page costs one LIMIT query regardless of how deep the cursor is.
+    """
+    ordering = tuple(ordering)
+    queryset = queryset.order_by(*ordering)
+
+    values = decode_cursor(cursor, queryset.model, ordering)
+    if values is not None:
+        queryset = queryset.filter(_seek_filter(ordering, values))
+
+    rows = list(queryset[:per_page + 1])
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    next_cursor = None
+    if has_next and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, name.lstrip('-')) for name in ordering])
+
+    return KeysetPage(items=rows, next_cursor=next_cursor, has_next=has_next, ordering=ordering)
+
+
+def url_prefix(viewname):
+    """
+    Reverse ``viewname`` once with a sentinel id and return the part before it,
+    so templates can build ``{{ prefix }}{{ obj.id }}/`` without reversing per row.
+    """
+    sentinel = 987654321
+    url = reverse(viewname, args=[sentinel])
+    return url.rsplit(str(sentinel), 1)[0]
@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Participant
+
+SESSION_KEY = 'participant_id'
+# Sessions created before the id was stored only carry the email.
+LEGACY_SESSION_KEY = 'participant_email'
+
+# Everything the volunteer pages read; the password hash is left deferred.
+CACHED_FIELDS = ('id', 'fullname', 'username', 'email', 'points', 'user_id')
+
+
+class ParticipantCache:
+    """
+    Small per-process LRU of participant rows keyed by primary key.
+
+    Entries are dropped when the participant is saved, deleted or awarded
+    points in this process; the timeout bounds how long another worker's
+    changes can go unseen.
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, pk):
+        with self._lock:
+            hit = self._rows.get(pk)
+            if hit is None:
+                return None
+            expires, values = hit
+            if expires < time.monotonic():
+                del self._rows[pk]
+                return None
+            self._rows.move_to_end(pk)
+        # A fresh instance per request, so views can mutate it freely.
+        return Participant.from_db('default', CACHED_FIELDS, values)
+
+    def set(self, participant):
+        values = tuple(getattr(participant, attname) for attname in CACHED_FIELDS)
+        with self._lock:
+            self._rows[participant.pk] = (time.monotonic() + self.timeout, values)
+            self._rows.move_to_end(participant.pk)
+            while len(self._rows) > self.max_size:
+                self._rows.popitem(last=False)
+
+    def delete(self, pk):
+        with self._lock:
+            self._rows.pop(pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+
+participant_cache = ParticipantCache(
+    max_size=getattr(settings, 'PARTICIPANT_CACHE_SIZE', 1024),
+    timeout=getattr(settings, 'PARTICIPANT_CACHE_TIMEOUT', 30),
+)
+
+
+def forget_participant(pk):
+    # Drop it now and again after commit, so a read racing the write cannot re-cache the old row.
+    participant_cache.delete(pk)
+    transaction.on_commit(lambda: participant_cache.delete(pk))
+
+
+def forget_participants(pks):
+    pks = list(pks)
+    for pk in pks:
+        participant_cache.delete(pk)
+
+    def forget():
+        for pk in pks:
+            participant_cache.delete(pk)
+
+    transaction.on_commit(forget)
+
+
+def load_participant(pk):
+    participant = participant_cache.get(pk)
+    if participant is None:
+        participant = Participant.objects.only(*CACHED_FIELDS).filter(pk=pk).first()
+        if participant is not None:
+            participant_cache.set(participant)
+    return participant
+
+
+def login_participant(request, participant):
+    request.session.cycle_key()
+    request.session[SESSION_KEY] = participant.pk
+    request.session.pop(LEGACY_SESSION_KEY, None)
+    request._cached_participant = participant
+
+
+def logout_participant(request):
+    request.session.pop(SESSION_KEY, None)
+    request.session.pop(LEGACY_SESSION_KEY, None)
+    request._cached_participant = None
+
+
+def get_participant(request):
+    """The logged-in volunteer for this request, or None; resolved at most once."""
+    if not hasattr(request, '_cached_participant'):
+        participant = None
+        pk = request.session.get(SESSION_KEY)
+        if pk is not None:
+            participant = load_participant(pk)
+        else:
+            email = request.session.get(LEGACY_SESSION_KEY)
+            if email:
+                participant = Participant.objects.only(*CACHED_FIELDS).filter(email=email).first()
+                if participant is not None:
+                    request.session[SESSION_KEY] = participant.pk
+                    participant_cache.set(participant)
+
+        if participant is None and (pk is not None or LEGACY_SESSION_KEY in request.session):
+            # The account is gone; stop looking it up on every request.
+            logout_participant(request)
+        request._cached_participant = participant
+    return request._cached_participant
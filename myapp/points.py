@@ -0,0 +1,110 @@
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Now
+
+from .leaderboard import record_activity
+from .models import Activity, CleanupRegistration, Participant, ParticipantPointsSummary
+from .participants import forget_participant
+
+AWARDED = Q(attended=True, approved=True, points_awarded=True)
+
+
+def award_points(participant, points, event=None, cleanup_type=None, description='', awarded_by=None):
+    """
+    Append a ledger entry and move the cached balance by ``points``.
+
+    The balance changes with a single ``points = points + n`` UPDATE on that
+    column only, so concurrent awards never overwrite each other.
+    """
+    if cleanup_type is None:
+        cleanup_type = event.place if event is not None else 'general'
+
+    with transaction.atomic():
+        Participant.objects.filter(pk=participant.pk).update(points=F('points') + points)
+        # The UPDATE holds the row lock until commit, so this read is our own balance.
+        balance = Participant.objects.filter(pk=participant.pk).values_list('points', flat=True).get()
+        entry = Activity.objects.create(
+            participant=participant,
+            event=event,
+            cleanup_type=cleanup_type,
+            points_earned=points,
+            description=description,
+            balance_after=balance,
+            awarded_by=awarded_by,
+        )
+        record_activity(entry)
+        forget_participant(participant.pk)
+        refresh_points_summaries([participant.pk])
+
+    participant.points = balance
+    return entry
+
+
+def refresh_points_summaries(participant_ids):
+    """
+    Recompute the summary rows of ``participant_ids`` with one UPDATE.
+
+    The awarded total is summed from the Activity ledger, so it is what was
+    actually credited and agrees with Participant.points even after an
+    event's points are edited. Only existing rows are touched;
+    get_points_summary() creates missing ones on first read, which keeps
+    this safe to call while a participant is being deleted.
+    """
+    ledger = Activity.objects.filter(participant=OuterRef('participant_id')).order_by().values('participant')
+    pending = (
+        CleanupRegistration.objects.filter(participant=OuterRef('participant_id'), attended=True)
+        .exclude(AWARDED).order_by().values('participant')
+    )
+
+    return ParticipantPointsSummary.objects.filter(participant_id__in=participant_ids).update(
+        total_awarded=Coalesce(Subquery(ledger.annotate(total=Sum('points_earned')).values('total')), 0),
+        pending_count=Coalesce(Subquery(pending.annotate(n=Count('pk')).values('n')), 0),
+        last_awarded_at=Subquery(ledger.annotate(last=Max('date_participated')).values('last')),
+        updated_at=Now(),
+    )
+
+
+def get_points_summary(participant):
+    try:
+        return ParticipantPointsSummary.objects.get(participant=participant)
+    except ParticipantPointsSummary.DoesNotExist:
+        ParticipantPointsSummary.objects.bulk_create(
+            [ParticipantPointsSummary(participant=participant)], ignore_conflicts=True
+        )
+        refresh_points_summaries([participant.pk])
+        return ParticipantPointsSummary.objects.get(participant=participant)
+
+
+def rebuild_ledger_balances(participant_ids=None):
+    """
+    Recompute every ledger row's balance_after with a window function and set
+    Participant.points to each participant's ledger total, in two statements.
+
+    ``participant_ids`` limits both statements to those participants.
+    """
+    activity = Activity._meta.db_table
+    participant = Participant._meta.db_table
+    activity_scope = participant_scope = ''
+    params = []
+    if participant_ids is not None:
+        params = list(participant_ids)
+        if not params:
+            return
+        marks = ', '.join(['%s'] * len(params))
+        activity_scope = f' WHERE participant_id IN ({marks})'
+        participant_scope = f' WHERE id IN ({marks})'
+    with connection.cursor() as db:
+        db.execute(
+            f'UPDATE {activity} SET balance_after = running.total FROM ('
+            f'  SELECT id, SUM(points_earned) OVER ('
+            f'    PARTITION BY participant_id ORDER BY date_participated, id'
+            f'  ) AS total FROM {activity}{activity_scope}'
+            f') AS running WHERE running.id = {activity}.id',
+            params,
+        )
+        db.execute(
+            f'UPDATE {participant} SET points = COALESCE(('
+            f'  SELECT SUM(points_earned) FROM {activity} WHERE {activity}.participant_id = {participant}.id'
+            f'), 0){participant_scope}',
+            params,
+        )
@@ -0,0 +1,224 @@
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .jobs import job
+from .models import CleanupRegistration, ProofImage
+
+PROOF_DIR = 'proofs'
+INCOMING_DIR = f'{PROOF_DIR}/incoming'
+# Pillow format -> extension of the EXIF-free original we keep.
+ALLOWED_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+
+def max_upload_bytes():
+    return getattr(settings, 'PROOF_IMAGE_MAX_BYTES', 15 * 1024 * 1024)
+
+
+def _media_path(name):
+    return os.path.join(settings.MEDIA_ROOT, name)
+
+
+def _incoming_name(sha256):
+    return f'{INCOMING_DIR}/{sha256}'
+
+
+def _variant_name(sha256, variant, extension):
+    # Fan out by hash prefix so no directory grows unbounded.
+    return f'{PROOF_DIR}/{sha256[:2]}/{sha256}-{variant}.{extension}'
+
+
+class HashedUploadedFile(UploadedFile):
+    """An upload already on disk under MEDIA_ROOT, with its content hash."""
+
+    def __init__(self, file, name, content_type, size, charset, sha256):
+        super().__init__(file, name, content_type, size, charset)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class ProofUploadHandler(FileUploadHandler):
+    """
+    Stream multipart file data straight to MEDIA_ROOT/proofs/incoming.
+
+    Chunks are written and hashed as they arrive, so a 10 MB phone photo is
+    never held in memory, never copied a second time, and its SHA-256 is
+    ready when the request body has been read. Files over
+    PROOF_IMAGE_MAX_BYTES are dropped mid-stream. Every completed file is
+    kept in ``uploads`` so the view can delete what it did not attach.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.too_large = False
+        self.file = None
+        self.uploads = []
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        directory = _media_path(INCOMING_DIR)
+        os.makedirs(directory, exist_ok=True)
+        self.file = tempfile.NamedTemporaryFile(dir=directory, prefix='upload-', delete=False)
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > max_upload_bytes():
+            self.too_large = True
+            self._discard()
+            raise SkipFile()
+        self.file.write(raw_data)
+        self.hash.update(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        self.file.flush()
+        self.file.seek(0)
+        upload = HashedUploadedFile(
+            self.file, self.file_name, self.content_type, self.size, self.charset, self.hash.hexdigest(),
+        )
+        self.uploads.append(upload)
+        return upload
+
+    def upload_interrupted(self):
+        self._discard()
+
+    def _discard(self):
+        # Leave self.file in place: the parser closes it again after SkipFile.
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+            try:
+                os.unlink(self.file.name)
+            except FileNotFoundError:
+                pass
+
+
+def _check_image(path):
+    """Read just the header: reject anything Pillow cannot identify as an allowed format."""
+    try:
+        with Image.open(path) as image:
+            if image.format not in ALLOWED_FORMATS:
+                raise ValidationError('Upload a JPEG, PNG or WebP photo.')
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise ValidationError('The uploaded file is not an image.')
+
+
+def attach_proof(registration, upload, notes=''):
+    """
+    Attach ``upload`` to ``registration``, reusing an existing ProofImage with
+    the same content, and queue the variants for new images.
+    """
+    if isinstance(upload, HashedUploadedFile):
+        path, sha256 = upload.temporary_file_path(), upload.sha256
+    else:
+        # Uploads that did not come through ProofUploadHandler (tests, Django admin).
+        directory = _media_path(INCOMING_DIR)
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=directory, prefix='upload-', delete=False) as out:
+            for chunk in upload.chunks():
+                out.write(chunk)
+                digest.update(chunk)
+        path, sha256 = out.name, digest.hexdigest()
+    upload.close()
+
+    try:
+        _check_image(path)
+        with transaction.atomic():
+            proof, created = ProofImage.objects.get_or_create(sha256=sha256, defaults={'size': upload.size})
+            if created:
+                os.replace(path, _media_path(_incoming_name(sha256)))
+                path = None
+                # Queued in this transaction: the worker only sees it once the file is in place.
+                process_proof.delay(proof_id=proof.pk)
+            registration.proof = proof
+            registration.proof_notes = notes
+            registration.save(update_fields=['proof', 'proof_notes'])
+    finally:
+        if path is not None:
+            # Duplicate content (or a rejected file): the bytes are not needed.
+            os.unlink(path)
+    return proof
+
+
+def discard_upload(upload):
+    """Delete a streamed upload that was never attached (for instance, the form was invalid)."""
+    if isinstance(upload, HashedUploadedFile):
+        upload.close()
+        try:
+            os.unlink(upload.temporary_file_path())
+        except FileNotFoundError:
+            pass
+
+
+def _save_variant(image, name, extension, **options):
+    path = _media_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fmt = {'jpg': 'JPEG', 'png': 'PNG', 'webp': 'WEBP'}[extension]
+    # Saving without exif= drops EXIF, including GPS coordinates.
+    image.save(path, fmt, **options)
+    return name
+
+
+def render_variants(proof):
+    """Write the EXIF-free original and the WebP display/thumbnail variants; returns field values."""
+    source = _media_path(_incoming_name(proof.sha256))
+    display_size = getattr(settings, 'PROOF_DISPLAY_SIZE', 1600)
+    thumbnail_size = getattr(settings, 'PROOF_THUMBNAIL_SIZE', 320)
+
+    with Image.open(source) as opened:
+        extension = ALLOWED_FORMATS[opened.format]
+        # Apply the camera's orientation before the EXIF that carries it is dropped.
+        image = ImageOps.exif_transpose(opened)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        if extension == 'jpg' and image.mode == 'RGBA':
+            image = image.convert('RGB')
+
+        original = _save_variant(image, _variant_name(proof.sha256, 'original', extension), extension,
+                                 **({'quality': 90} if extension != 'png' else {'optimize': True}))
+        display = image.copy()
+        display.thumbnail((display_size, display_size))
+        display_name = _save_variant(display, _variant_name(proof.sha256, 'display', 'webp'), 'webp', quality=80)
+        display.thumbnail((thumbnail_size, thumbnail_size))
+        thumbnail_name = _save_variant(display, _variant_name(proof.sha256, 'thumb', 'webp'), 'webp', quality=70)
+
+    return {
+        'original': original, 'display': display_name, 'thumbnail': thumbnail_name,
+        'width': image.width, 'height': image.height,
+    }
+
+
+@job(max_attempts=3)
+def process_proof(proof_id):
+    """Build the variants of one pending proof; safe to call again for the same id."""
+    proof = ProofImage.objects.filter(pk=proof_id).first()
+    if proof is None or proof.status == ProofImage.READY:
+        return proof
+    try:
+        fields = render_variants(proof)
+    except Exception as exc:
+        # Recorded for the review page; the job runner logs and retries.
+        ProofImage.objects.filter(pk=proof_id).update(status=ProofImage.FAILED, error=str(exc)[:1000])
+        raise
+
+    with transaction.atomic():
+        ProofImage.objects.filter(pk=proof_id).update(status=ProofImage.READY, error='', **fields)
+        # Keep the legacy field pointing at the EXIF-free file.
+        CleanupRegistration.objects.filter(proof_id=proof_id).update(proof_image=fields['original'])
+    try:
+        os.unlink(_media_path(_incoming_name(proof.sha256)))
+    except FileNotFoundError:
+        pass
+    return proof
+
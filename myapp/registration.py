@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+from enum import Enum
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .event_feed import invalidate_event_feed
+from .models import CleanupEvent, CleanupRegistration
+
+
+class RegistrationStatus(Enum):
+    REGISTERED = 'registered'
+    ALREADY_REGISTERED = 'already_registered'
+    FULL = 'full'
+
+
+@dataclass
+class RegistrationResult:
+    status: RegistrationStatus
+    event: CleanupEvent
+    registration: CleanupRegistration = None
+
+    @property
+    def ok(self):
+        return self.status is RegistrationStatus.REGISTERED
+
+
+def register_participant(participant, event):
+    """
+    Claim a seat on ``event`` for ``participant``.
+
+    The seat is taken with a conditional ``registered_count`` increment, which
+    locks the event row for the rest of the transaction, and the insert relies
+    on the (participant, event) unique constraint instead of a pre-check.
+    """
+    with transaction.atomic():
+        claimed = CleanupEvent.objects.filter(
+            pk=event.pk, registered_count__lt=F('max_participants')
+        ).update(registered_count=F('registered_count') + 1)
+
+        if not claimed:
+            if CleanupRegistration.objects.filter(participant=participant, event=event).exists():
+                return RegistrationResult(RegistrationStatus.ALREADY_REGISTERED, event)
+            return RegistrationResult(RegistrationStatus.FULL, event)
+
+        registration = CleanupRegistration(participant=participant, event=event)
+        registration._counted = True
+        try:
+            with transaction.atomic():
+                registration.save()
+        except IntegrityError:
+            # Give the seat back along with the failed insert.
+            transaction.set_rollback(True)
+            return RegistrationResult(RegistrationStatus.ALREADY_REGISTERED, event)
+        invalidate_event_feed()
+
+    return RegistrationResult(RegistrationStatus.REGISTERED, event, registration)
+
+
+def adjust_event_counts(event_id, registered=0, attended=0):
+    changes = {}
+    if registered:
+        changes['registered_count'] = F('registered_count') + registered
+    if attended:
+        changes['attended_count'] = F('attended_count') + attended
+    if changes:
+        CleanupEvent.objects.filter(pk=event_id).update(**changes)
+        invalidate_event_feed()
+
+
+def recount_event_counters(events=None):
+    """Recompute registered/attended counts from the registrations table in one UPDATE."""
+    if events is None:
+        events = CleanupEvent.objects.all()
+
+    counts = (
+        CleanupRegistration.objects.filter(event=OuterRef('pk'))
+        .order_by()
+        .values('event')
+    )
+    invalidate_event_feed()
+    return events.update(
+        registered_count=Coalesce(Subquery(counts.annotate(n=Count('pk')).values('n')), 0),
+        attended_count=Coalesce(Subquery(counts.annotate(n=Count('pk', filter=Q(attended=True))).values('n')), 0),
+    )
@@ -0,0 +1,184 @@
+import re
+from abc import ABC, abstractmethod
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import CleanupEvent
+from .pagination import KeysetPage, decode_raw_cursor, encode_cursor, keyset_paginate
+
+FTS_TABLE = 'myapp_cleanupevent_fts'
+EVENT_TABLE = CleanupEvent._meta.db_table
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def _terms(query):
+    return _WORD.findall(query.lower())[:8]
+
+
+def _parse_cursor(token):
+    raw = decode_raw_cursor(token)
+    if raw is None or len(raw) != 2:
+        return None
+    try:
+        return float(raw[0]), int(raw[1])
+    except ValueError:
+        return None
+
+
+class EventSearchBackend(ABC):
+    """Search over event name, place and location, returning a KeysetPage."""
+
+    @abstractmethod
+    def search(self, query, before=None, on_date=None, cursor=None, per_page=20):
+        """Events matching ``query``, optionally before or on a date, one page at a time."""
+
+
+class RankedSearchBackend(EventSearchBackend):
+    """
+    Ranked search on a full-text index.
+
+    Results are ordered by (score DESC, id ASC) and paginated with a seek
+    cursor on that pair, so deep pages cost the same as the first one.
+    """
+
+    def search(self, query, before=None, on_date=None, cursor=None, per_page=20):
+        terms = _terms(query)
+        if not terms:
+            return KeysetPage(items=[])
+
+        # Filters apply to the ranked projection (id, date, score).
+        where, params = [], []
+        if before is not None:
+            where.append('date < %s')
+            params.append(before.isoformat())
+        if on_date is not None:
+            where.append('date = %s')
+            params.append(on_date.isoformat())
+        position = _parse_cursor(cursor)
+        if position is not None:
+            where.append('(score < %s OR (score = %s AND id > %s))')
+            params.extend([position[0], position[0], position[1]])
+
+        ranked, match_params = self.ranked_sql(terms)
+        sql = f'SELECT id, score FROM ({ranked}) ranked'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY score DESC, id ASC LIMIT %s'
+
+        with connection.cursor() as db:
+            db.execute(sql, match_params + params + [per_page + 1])
+            rows = db.fetchall()
+
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        events = CleanupEvent.objects.in_bulk([pk for pk, _ in rows])
+        items = [events[pk] for pk, _ in rows if pk in events]
+
+        next_cursor = None
+        if has_next and rows:
+            next_cursor = encode_cursor([repr(rows[-1][1]), rows[-1][0]])
+        return KeysetPage(items=items, next_cursor=next_cursor, has_next=has_next)
+
+    @abstractmethod
+    def ranked_sql(self, terms):
+        """(sql, params) of a SELECT of the matching events' id, date and score."""
+
+
+class SQLiteSearchBackend(RankedSearchBackend):
+    """FTS5 table kept in sync by triggers (see migration 0010)."""
+
+    def ranked_sql(self, terms):
+        # Every term is quoted and used as a prefix query: "beac"* matches beach.
+        match = ' '.join('"%s"*' % term.replace('"', '') for term in terms)
+        sql = (
+            f'SELECT e.id AS id, e.date AS date, -bm25({FTS_TABLE}, 10.0, 2.0, 5.0) AS score '
+            f'FROM {FTS_TABLE} JOIN {EVENT_TABLE} e ON e.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s'
+        )
+        return sql, [match]
+
+
+class PostgresSearchBackend(RankedSearchBackend):
+    """
+    Generated tsvector column with a GIN index for whole and prefix words, plus
+    pg_trgm GIN indexes so fragments inside words still match.
+    """
+
+    def ranked_sql(self, terms):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        like = '%' + ' '.join(terms) + '%'
+        text = ' '.join(terms)
+        sql = (
+            'SELECT e.id AS id, e.date AS date, '
+            "(ts_rank_cd(e.search_vector, to_tsquery('simple', %s)) "
+            ' + greatest(similarity(e.name, %s), similarity(e.specific_location, %s)))::float8 AS score '
+            f'FROM {EVENT_TABLE} e '
+            "WHERE e.search_vector @@ to_tsquery('simple', %s) "
+            '   OR e.name ILIKE %s OR e.specific_location ILIKE %s'
+        )
+        return sql, [tsquery, text, text, tsquery, like, like]
+
+
+class FallbackSearchBackend(EventSearchBackend):
+    """Unindexed icontains search for databases without a full-text engine."""
+
+    def search(self, query, before=None, on_date=None, cursor=None, per_page=20):
+        events = CleanupEvent.objects.all()
+        if before is not None:
+            events = events.filter(date__lt=before)
+        if on_date is not None:
+            events = events.filter(date=on_date)
+        for term in _terms(query):
+            events = events.filter(
+                Q(name__icontains=term) | Q(place__icontains=term) | Q(specific_location__icontains=term)
+            )
+        return keyset_paginate(events, ('-date', '-id'), cursor, per_page)
+
+
+_backend = None
+
+
+def _sqlite_index_exists():
+    with connection.cursor() as db:
+        db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return db.fetchone() is not None
+
+
+def _postgres_index_exists():
+    with connection.cursor() as db:
+        db.execute(
+            'SELECT 1 FROM information_schema.columns WHERE table_name = %s AND column_name = %s',
+            [EVENT_TABLE, 'search_vector'],
+        )
+        return db.fetchone() is not None
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'sqlite' and _sqlite_index_exists():
+            _backend = SQLiteSearchBackend()
+        elif connection.vendor == 'postgresql' and _postgres_index_exists():
+            _backend = PostgresSearchBackend()
+        else:
+            _backend = FallbackSearchBackend()
+    return _backend
+
+
+def search_events(query, before=None, on_date=None, cursor=None, per_page=20):
+    return get_search_backend().search(query, before, on_date, cursor, per_page)
+
+
+def rebuild_search_index():
+    """Repopulate the SQLite FTS table; the Postgres column is generated and needs no rebuild."""
+    if not isinstance(get_search_backend(), SQLiteSearchBackend):
+        return 0
+    with connection.cursor() as db:
+        db.execute(f'DELETE FROM {FTS_TABLE}')
+        db.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, place, specific_location) '
+            f'SELECT id, name, place, specific_location FROM {EVENT_TABLE}'
+        )
+        return db.rowcount
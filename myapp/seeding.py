@@ -0,0 +1,179 @@
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk import batched, insert_rows
+from .models import Activity, CleanupEvent, CleanupRegistration, Participant
+from .leaderboard import record_ledger
+from .points import rebuild_ledger_balances
+from .registration import recount_event_counters
+
+PLACES = [value for value, _ in CleanupEvent.PLACE_CHOICES]
+FIRST_NAMES = ['Juan', 'Maria', 'Jose', 'Ana', 'Mark', 'Grace', 'Paolo', 'Liza', 'Carlo', 'Joy', 'Miguel', 'Rosa']
+LAST_NAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres', 'Flores', 'Ramos', 'Aquino']
+BARANGAYS = ['Tondo', 'Sampaloc', 'Malate', 'Ermita', 'Pandacan', 'Paco', 'Binondo', 'Quiapo', 'San Andres']
+LOCATIONS = {
+    'beach': ['Manila Bay, Roxas Boulevard', 'Baseco Beach', 'Dolphin Beach, Manila Bay'],
+    'park': ['Rizal Park', 'Arroceros Forest Park', 'Paco Park'],
+    'street': ['Taft Avenue', 'España Boulevard', 'Recto Avenue'],
+    'river': ['Pasig River Esplanade', 'Estero de Paco', 'San Juan River'],
+    'general': ['Barangay Hall grounds', 'Public Market', 'Elementary School grounds'],
+}
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk inserts keep the timestamps we generate instead of auto_now_add."""
+    saved = [(f, f.auto_now_add) for f in fields]
+    for f, _ in saved:
+        f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, value in saved:
+            f.auto_now_add = value
+
+
+def seed_dataset(events=200, participants=1000, registrations=10000, activities=2000,
+                 seed=0, batch_size=5000, prefix=None, log=None):
+    """
+    Bulk-load a realistic, deterministic dataset.
+
+    Passwords share one pre-computed hash, events and participants are
+    batched bulk_creates, registrations and activities go through
+    ``insert_rows``, and the derived data (event counters, ledger balances,
+    participant points, leaderboards) is computed with set-based UPDATEs at
+    the end, for the seeded events and participants only.
+    """
+    rng = random.Random(seed)
+    prefix = prefix or f's{seed}'
+    log = log or (lambda message: None)
+    now = timezone.now()
+    today = now.date()
+    password = make_password('volunteer123')
+
+    event_ids, event_info = [], {}
+    with transaction.atomic(), explicit_timestamps(CleanupEvent._meta.get_field('created_at')):
+        for batch in batched(range(events), batch_size):
+            rows = []
+            for i in batch:
+                place = rng.choice(PLACES)
+                day = today + timedelta(days=rng.randint(-540, 120))
+                rows.append(CleanupEvent(
+                    name=f'{place.title()} Cleanup #{i + 1}',
+                    place=place,
+                    specific_location=rng.choice(LOCATIONS[place]),
+                    date=day,
+                    start_time=time(rng.choice([6, 7, 8, 9, 14, 15])),
+                    duration=rng.choice([2, 3, 4]),
+                    points=rng.choice([10, 15, 20, 25]),
+                    max_participants=rng.choice([30, 50, 100, 200, 500]),
+                    is_completed=day < today,
+                    created_at=now - timedelta(days=max(0, (today - day).days) + 14),
+                ))
+            CleanupEvent.objects.bulk_create(rows, batch_size=batch_size)
+            for event in rows:
+                event_ids.append(event.pk)
+                event_info[event.pk] = (event.date, event.points, event.place, event.max_participants)
+    log(f'events: {len(event_ids)}')
+
+    participant_ids = []
+    with transaction.atomic(), explicit_timestamps(Participant._meta.get_field('registered_at')):
+        for batch in batched(range(participants), batch_size):
+            rows = []
+            for i in batch:
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                rows.append(Participant(
+                    fullname=f'{first} {last}',
+                    username=f'{prefix}_vol{i}',
+                    email=f'{prefix}.vol{i}@example.com',
+                    address=f'{rng.choice(BARANGAYS)}, Manila',
+                    contact_number=f'{prefix[:3]}{i:011d}'[-15:],
+                    birthdate=today - timedelta(days=rng.randint(16 * 365, 60 * 365)),
+                    password=password,
+                    registered_at=now - timedelta(days=rng.randint(0, 720), seconds=rng.randint(0, 86400)),
+                ))
+            Participant.objects.bulk_create(rows, batch_size=batch_size)
+            participant_ids.extend(p.pk for p in rows)
+    log(f'participants: {len(participant_ids)}')
+
+    # Noon on the event day and 10:00 the day after, aware, worked out once per event.
+    event_times = {
+        pk: (timezone.make_aware(datetime.combine(day, time(12))),
+             timezone.make_aware(datetime.combine(day + timedelta(days=1), time(10))))
+        for pk, (day, *_) in event_info.items()
+    }
+    # participant_id << 32 | event_id: a set of ints is far smaller than one of tuples at a million rows.
+    taken = set()
+    seats = dict.fromkeys(event_ids, 0)
+
+    def registration_rows():
+        attempts = 0
+        made = 0
+        while made < registrations and attempts < registrations * 3:
+            attempts += 1
+            event_id = rng.choice(event_ids)
+            participant_id = rng.choice(participant_ids)
+            day, points, place, capacity = event_info[event_id]
+            key = participant_id << 32 | event_id
+            if key in taken or seats[event_id] >= capacity:
+                continue
+            taken.add(key)
+            seats[event_id] += 1
+            made += 1
+
+            noon, approval_time = event_times[event_id]
+            registered_at = min(now, noon - timedelta(days=rng.randint(1, 30), seconds=rng.randint(0, 86400)))
+            attended = day < today and rng.random() < 0.7
+            approved = attended and rng.random() < 0.8
+            approved_at = approval_time if approved else None
+            yield (participant_id, event_id, registered_at, attended, approved, approved, approved_at)
+
+    # Registrations and activities are the bulk of a large dataset and nothing
+    # needs their primary keys, so they skip bulk_create's model instances.
+    registration_fields = [
+        'participant_id', 'event_id', 'registered_at', 'attended', 'approved', 'points_awarded', 'approved_at',
+    ]
+    activity_fields = ['participant_id', 'event_id', 'cleanup_type', 'points_earned', 'date_participated',
+                       'description']
+    created = 0
+    for batch in batched(registration_rows(), batch_size):
+        with transaction.atomic():
+            insert_rows(CleanupRegistration, registration_fields, batch, batch_size)
+            # Every approved registration is also an award in the points ledger.
+            insert_rows(Activity, activity_fields, [
+                (participant_id, event_id, event_info[event_id][2], event_info[event_id][1], approved_at,
+                 'Cleanup points')
+                for participant_id, event_id, _, _, approved, _, approved_at in batch if approved
+            ], batch_size)
+        created += len(batch)
+        log(f'registrations: {created}')
+
+    manual = (
+        (rng.choice(participant_ids), None, 'general', rng.choice([5, 10, 20]),
+         now - timedelta(days=rng.randint(0, 540), seconds=rng.randint(0, 86400)), 'Awarded by admin')
+        for _ in range(activities if participant_ids else 0)
+    )
+    with transaction.atomic():
+        insert_rows(Activity, activity_fields, manual, batch_size)
+    log(f'manual awards: {activities if participant_ids else 0}')
+
+    # Only the rows made here: events, participants and data already in the tables are left alone.
+    with transaction.atomic():
+        for batch in batched(event_ids, batch_size):
+            recount_event_counters(CleanupEvent.objects.filter(pk__in=batch))
+        for batch in batched(participant_ids, batch_size):
+            rebuild_ledger_balances(batch)
+            record_ledger(batch)
+    log('counters, balances and leaderboards computed for the seeded rows')
+
+    return {
+        'events': len(event_ids),
+        'participants': len(participant_ids),
+        'registrations': created,
+        'activities': activities if participant_ids else 0,
+    }
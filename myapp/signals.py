@@ -0,0 +1,144 @@
+import threading
+import time
+
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .event_feed import invalidate_event_feed
+from .leaderboard import remove_participant
+from .middleware import ADMIN_ACTIVITY_KEY
+from .models import CleanupEvent, CleanupRegistration, Participant
+from .page_cache import invalidate_pages
+from .participants import forget_participant
+from .points import refresh_points_summaries
+from .registration import adjust_event_counts, recount_event_counters
+
+# Events and participants this thread is deleting. Their registrations go
+# with them in a cascade, and are accounted for once per delete instead of
+# with a counter UPDATE and a summary refresh per registration.
+_cascading = threading.local()
+
+
+def _cascade(model):
+    deleting = getattr(_cascading, model, None)
+    if deleting is None:
+        deleting = {}
+        setattr(_cascading, model, deleting)
+    return deleting
+
+
+@receiver(pre_save, sender=CleanupRegistration)
+def remember_registration_state(sender, instance, **kwargs):
+    instance._previous_state = None
+    if instance.pk and not kwargs.get('raw'):
+        instance._previous_state = (
+            CleanupRegistration.objects.filter(pk=instance.pk)
+            .values_list('event_id', 'attended', 'approved', 'points_awarded')
+            .first()
+        )
+
+
+@receiver(post_save, sender=CleanupRegistration)
+def update_event_counts_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        if getattr(instance, '_counted', False):
+            # register_participant() already claimed the seat; only attendance is left.
+            adjust_event_counts(instance.event_id, attended=int(instance.attended))
+        else:
+            adjust_event_counts(instance.event_id, registered=1, attended=int(instance.attended))
+        return
+
+    previous = getattr(instance, '_previous_state', None)
+    if previous is None:
+        return
+    old_event_id, old_attended = previous[:2]
+    if old_event_id != instance.event_id:
+        adjust_event_counts(old_event_id, registered=-1, attended=-int(old_attended))
+        adjust_event_counts(instance.event_id, registered=1, attended=int(instance.attended))
+    elif old_attended != instance.attended:
+        adjust_event_counts(instance.event_id, attended=1 if instance.attended else -1)
+
+
+@receiver(post_delete, sender=CleanupRegistration)
+def update_event_counts_on_delete(sender, instance, **kwargs):
+    if instance.event_id in _cascade('events') or instance.participant_id in _cascade('participants'):
+        return
+    adjust_event_counts(instance.event_id, registered=-1, attended=-int(instance.attended))
+
+
+@receiver(post_save, sender=CleanupRegistration)
+def refresh_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        # Nothing is pending or awarded until the volunteer has attended.
+        changed = instance.attended
+    else:
+        current = (instance.event_id, instance.attended, instance.approved, instance.points_awarded)
+        changed = getattr(instance, '_previous_state', None) != current
+    if changed:
+        refresh_points_summaries([instance.participant_id])
+
+
+@receiver(post_delete, sender=CleanupRegistration)
+def refresh_summary_on_delete(sender, instance, **kwargs):
+    if instance.event_id in _cascade('events') or instance.participant_id in _cascade('participants'):
+        return
+    refresh_points_summaries([instance.participant_id])
+
+
+@receiver(pre_delete, sender=CleanupEvent)
+def start_event_cascade(sender, instance, **kwargs):
+    _cascade('events')[instance.pk] = list(
+        CleanupRegistration.objects.filter(event=instance).values_list('participant_id', flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=CleanupEvent)
+def finish_event_cascade(sender, instance, **kwargs):
+    participant_ids = _cascade('events').pop(instance.pk, None)
+    if participant_ids:
+        refresh_points_summaries(participant_ids)
+
+
+@receiver(pre_delete, sender=Participant)
+def start_participant_cascade(sender, instance, **kwargs):
+    _cascade('participants')[instance.pk] = list(
+        CleanupRegistration.objects.filter(participant=instance).values_list('event_id', flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=Participant)
+def finish_participant_cascade(sender, instance, **kwargs):
+    # The participant's summary row is gone with it; only the events' counters are left.
+    event_ids = _cascade('participants').pop(instance.pk, None)
+    if event_ids:
+        recount_event_counters(CleanupEvent.objects.filter(pk__in=event_ids))
+
+
+@receiver(post_save, sender=CleanupEvent)
+@receiver(post_delete, sender=CleanupEvent)
+def invalidate_feed_on_event_change(sender, **kwargs):
+    invalidate_event_feed()
+    invalidate_pages('events')
+
+
+@receiver(pre_delete, sender=Participant)
+def remove_from_leaderboards(sender, instance, **kwargs):
+    remove_participant(instance.pk)
+
+
+@receiver(post_save, sender=Participant)
+@receiver(post_delete, sender=Participant)
+def forget_cached_participant(sender, instance, **kwargs):
+    forget_participant(instance.pk)
+
+
+@receiver(user_logged_in)
+def start_admin_activity(sender, request, user, **kwargs):
+    # A new login starts a new idle window, whatever stamp an earlier login left behind.
+    if request is not None and user.is_staff:
+        request.session[ADMIN_ACTIVITY_KEY] = int(time.time())
@@ -0,0 +1,97 @@
+import io
+import json
+import os
+from fnmatch import fnmatch
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, features
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+# Written next to staticfiles.json; read by the {% responsive_image %} tag.
+RESPONSIVE_INDEX_NAME = 'responsive-images.json'
+
+# format -> Pillow save options
+VARIANT_FORMATS = {
+    'avif': {'quality': 50, 'speed': 6},
+    'webp': {'quality': 75, 'method': 6},
+}
+FALLBACK_OPTIONS = {
+    'jpg': {'format': 'JPEG', 'quality': 80, 'optimize': True, 'progressive': True},
+    'jpeg': {'format': 'JPEG', 'quality': 80, 'optimize': True, 'progressive': True},
+    'png': {'format': 'PNG', 'optimize': True},
+}
+
+
+def responsive_patterns():
+    return getattr(settings, 'RESPONSIVE_IMAGES', ('images/*.jpg', 'images/*.jpeg', 'images/*.png'))
+
+
+def responsive_widths():
+    return getattr(settings, 'RESPONSIVE_IMAGE_WIDTHS', (320, 640, 960, 1280))
+
+
+def variant_name(name, width, extension):
+    root, _ = os.path.splitext(name)
+    return f'{root}.w{width}.{extension}'
+
+
+class ResponsiveStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    WhiteNoise's compressed manifest storage, plus resized AVIF/WebP copies of
+    the images matching RESPONSIVE_IMAGES.
+
+    The copies are made before hashing, so they get hashed names in
+    staticfiles.json like any other file, and their sizes are listed in
+    responsive-images.json for the template tag.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            index = {}
+            for name in [name for name in paths if any(fnmatch(name, p) for p in responsive_patterns())]:
+                entry = self._make_variants(name)
+                if entry is not None:
+                    index[name] = entry
+                    for variants in entry['variants'].values():
+                        paths.update((variant, (self, variant)) for _, variant in variants if variant != name)
+            self._write_file(RESPONSIVE_INDEX_NAME, json.dumps(index, sort_keys=True).encode())
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def _write_file(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+
+    def _make_variants(self, name):
+        extension = os.path.splitext(name)[1].lstrip('.').lower()
+        if extension not in FALLBACK_OPTIONS:
+            return None
+        with self.open(name) as source, Image.open(source) as image:
+            image.load()
+        width, height = image.size
+        widths = sorted({w for w in responsive_widths() if w < width} | {width})
+
+        formats = {fmt: options for fmt, options in VARIANT_FORMATS.items() if features.check(fmt)}
+        # Opaque PNGs (photos saved as PNG) shrink far better as JPEG for old browsers.
+        fallback = 'jpg' if extension == 'png' and 'A' not in image.getbands() else extension
+        formats[fallback] = FALLBACK_OPTIONS[fallback]
+        variants = {}
+        for fmt, options in formats.items():
+            options = dict(options)
+            pil_format = options.pop('format', fmt.upper())
+            variants[fmt] = []
+            for w in widths:
+                if fmt == fallback and w == width:
+                    # The original already is this variant.
+                    variants[fmt].append([w, name])
+                    continue
+                target = variant_name(name, w, fmt)
+                resized = image if w == width else image.resize((w, round(height * w / width)), Image.LANCZOS)
+                if pil_format == 'JPEG' and resized.mode != 'RGB':
+                    resized = resized.convert('RGB')
+                buffer = io.BytesIO()
+                resized.save(buffer, pil_format, **options)
+                self._write_file(target, buffer.getvalue())
+                variants[fmt].append([w, target])
+        return {'width': width, 'height': height, 'variants': variants}
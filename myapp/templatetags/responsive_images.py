@@ -0,0 +1,57 @@
+import json
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from myapp.storage import RESPONSIVE_INDEX_NAME
+
+register = template.Library()
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+# Newest formats first: the browser takes the first <source> it supports.
+SOURCE_ORDER = ('avif', 'webp')
+
+
+@lru_cache(maxsize=1)
+def responsive_index():
+    """The variants collectstatic made; empty in development, where nothing has been collected."""
+    try:
+        with staticfiles_storage.open(RESPONSIVE_INDEX_NAME) as index:
+            return json.load(index)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _srcset(variants):
+    return ', '.join(f'{static(name)} {width}w' for width, name in variants)
+
+
+@register.simple_tag
+def responsive_image(name, alt='', sizes='100vw', **attrs):
+    """
+    Render a static image as a <picture> with AVIF/WebP sources at every
+    collected width, a srcset on the fallback <img>, and lazy loading.
+
+        {% responsive_image 'images/river.jpg' alt='River Cleanup' sizes='(min-width: 768px) 25vw, 100vw' class='activity-image' %}
+
+    Images collectstatic did not process are rendered as a plain lazy <img>.
+    """
+    extra = format_html_join('', ' {}="{}"', sorted(attrs.items()))
+    entry = responsive_index().get(name)
+    if entry is None:
+        return format_html('<img src="{}" alt="{}" loading="lazy" decoding="async"{}>', static(name), alt, extra)
+
+    variants = entry['variants']
+    fallback = next(fmt for fmt in variants if fmt not in SOURCE_ORDER)
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((MIME_TYPES[fmt], _srcset(variants[fmt]), sizes) for fmt in SOURCE_ORDER if fmt in variants),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" '
+        'loading="lazy" decoding="async"{}></picture>',
+        sources, static(name), _srcset(variants[fallback]), sizes, entry['width'], entry['height'], alt, extra,
+    )
@@ -1,3 +1,732 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, time, timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.middleware.csrf import get_token
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .approvals import approve_registrations, mark_attended
+from .benchmarks import full_scans, plan_regressions, seed_hot_paths
+from .event_feed import build_event_feed, upcoming_page
+from .importing import ParticipantImporter, RegistrationImporter, read_rows
+from .jobs import enqueue_periodically
+from .leaderboard import GLOBAL, add_score, add_scores, rank_of, rebuild_leaderboards
+from .models import (
+    Activity, CleanupEvent, CleanupRegistration, Job, LeaderboardEntry, LeaderboardNode, LoginAttempt, Notification,
+    Participant, ProofImage,
+)
+from .notifications import notify, prune_notifications, take_unread
+from .participants import SESSION_KEY as PARTICIPANT_SESSION_KEY, participant_cache
+from .points import award_points, get_points_summary, rebuild_ledger_balances
+from .proofs import INCOMING_DIR
+from .registration import RegistrationStatus, recount_event_counters, register_participant
+from .seeding import seed_dataset
+from .throttling import (
+    SlidingWindowThrottle, clear_login_failures, login_blocked, record_login_failure, registration_blocked,
+)
+
+isolated = override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    PAGE_CACHE_TIMEOUT=0,
+    METRICS_SAMPLE_RATE=0,
+    # Tests run with DEBUG off and no collectstatic, so there is no manifest to look names up in.
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+
+
+def make_participant(n=1, **fields):
+    defaults = {
+        'fullname': f'Volunteer {n}', 'username': f'volunteer{n}', 'email': f'volunteer{n}@example.com',
+        'contact_number': f'0917{n:07d}', 'address': 'Tondo, Manila', 'birthdate': date(1995, 1, 1),
+    }
+    return Participant.objects.create(**{**defaults, **fields})
+
+
+def make_event(n=1, **fields):
+    defaults = {
+        'name': f'Cleanup {n}', 'place': 'beach', 'specific_location': 'Manila Bay',
+        'date': date.today() + timedelta(days=7), 'start_time': time(8), 'duration': 2,
+        'max_participants': 10, 'points': 10,
+    }
+    return CleanupEvent.objects.create(**{**defaults, **fields})
+
+
+def counter_updates(queries):
+    return [q['sql'] for q in queries if q['sql'].startswith('UPDATE') and 'registered_count' in q['sql']]
+
+
+def log_in_volunteer(client, participant):
+    session = client.session
+    session[PARTICIPANT_SESSION_KEY] = participant.pk
+    session.save()
+
+
+class IsolatedTestCase(TestCase):
+    """Fresh local-memory cache and participant cache for every test."""
+
+    def setUp(self):
+        cache.clear()
+        participant_cache.clear()
+
+
+@isolated
+class RegistrationTests(IsolatedTestCase):
+
+    def test_seats_run_out(self):
+        event = make_event(max_participants=2)
+        statuses = [register_participant(make_participant(n), event).status for n in range(3)]
+
+        self.assertEqual(statuses, [RegistrationStatus.REGISTERED, RegistrationStatus.REGISTERED,
+                                    RegistrationStatus.FULL])
+        event.refresh_from_db()
+        self.assertEqual(event.registered_count, 2)
+
+    def test_losing_the_insert_race_gives_the_seat_back(self):
+        participant, event = make_participant(), make_event(max_participants=5)
+        # A concurrent request already inserted the row, so the unique constraint trips after the seat is claimed.
+        CleanupRegistration.objects.create(participant=participant, event=event)
+
+        result = register_participant(participant, event)
+
+        self.assertEqual(result.status, RegistrationStatus.ALREADY_REGISTERED)
+        event.refresh_from_db()
+        self.assertEqual(event.registered_count, 1)
+        self.assertEqual(CleanupRegistration.objects.filter(event=event).count(), 1)
+
+    def test_full_save_does_not_overwrite_counters(self):
+        event = make_event()
+        stale = CleanupEvent.objects.get(pk=event.pk)
+        register_participant(make_participant(), event)
+
+        stale.name = 'Renamed'
+        stale.save()
+
+        event.refresh_from_db()
+        self.assertEqual(event.registered_count, 1)
+
+    def test_deleting_a_participant_recounts_their_events_once(self):
+        events = [make_event(n) for n in range(3)]
+        leaving, staying = make_participant(1), make_participant(2)
+        for event in events:
+            register_participant(leaving, event)
+        register_participant(staying, events[0])
+
+        with CaptureQueriesContext(connection) as queries:
+            leaving.delete()
+
+        self.assertEqual(len(counter_updates(queries)), 1)
+        self.assertEqual(
+            list(CleanupEvent.objects.order_by('pk').values_list('registered_count', flat=True)), [1, 0, 0]
+        )
+
+    def test_deleting_an_event_skips_per_registration_updates(self):
+        event = make_event(max_participants=50)
+        participants = [make_participant(n) for n in range(20)]
+        for participant in participants:
+            register_participant(participant, event)
+
+        with CaptureQueriesContext(connection) as queries:
+            event.delete()
+
+        self.assertEqual(counter_updates(queries), [])
+        self.assertFalse(CleanupRegistration.objects.exists())
+
+
+@isolated
+class LedgerTests(IsolatedTestCase):
+
+    def test_balance_after_is_the_running_total(self):
+        participant = make_participant()
+        award_points(participant, 10)
+        award_points(participant, 15)
+        award_points(participant, -5)
+
+        balances = list(Activity.objects.order_by('id').values_list('balance_after', flat=True))
+        self.assertEqual(balances, [10, 25, 20])
+        participant.refresh_from_db()
+        self.assertEqual(participant.points, 20)
+
+    def test_rebuild_matches_incremental_balances(self):
+        participant = make_participant()
+        for points in (10, 20, 5):
+            award_points(participant, points)
+        before = list(Activity.objects.order_by('id').values_list('balance_after', flat=True))
+
+        Activity.objects.update(balance_after=None)
+        rebuild_ledger_balances()
+
+        self.assertEqual(list(Activity.objects.order_by('id').values_list('balance_after', flat=True)), before)
+
+    def test_deleting_an_event_keeps_its_ledger_rows(self):
+        participant = make_participant()
+        event = make_event()
+        award_points(participant, 10, event=event)
+
+        event.delete()
+        rebuild_ledger_balances()
+
+        entry = Activity.objects.get()
+        self.assertIsNone(entry.event_id)
+        self.assertEqual(entry.balance_after, 10)
+        participant.refresh_from_db()
+        self.assertEqual(participant.points, 10)
+
+
+@isolated
+class PointsSummaryTests(IsolatedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.participant = make_participant()
+        self.event = make_event(points=10, date=date.today() - timedelta(days=1))
+        registration = register_participant(self.participant, self.event).registration
+        approve_registrations(self.event, [registration.pk])
+
+    def test_summary_follows_the_ledger(self):
+        award_points(self.participant, 5, description='Awarded by admin')
+
+        summary = get_points_summary(self.participant)
+        self.participant.refresh_from_db()
+        self.assertEqual(summary.total_awarded, 15)
+        self.assertEqual(summary.total_awarded, self.participant.points)
+
+    def test_editing_event_points_does_not_rewrite_history(self):
+        self.event.points = 50
+        self.event.save()
+
+        self.assertEqual(get_points_summary(self.participant).total_awarded, 10)
+        log_in_volunteer(self.client, self.participant)
+        response = self.client.get('/points-history/')
+        self.assertEqual([row['points'] for row in response.context['points_history']], [10])
+        self.assertEqual(response.context['total_points'], 10)
+
+
+def leaderboard_state():
+    entries = set(LeaderboardEntry.objects.values_list('board', 'participant_id', 'score'))
+    nodes = set(LeaderboardNode.objects.exclude(count=0).values_list('board', 'node', 'count'))
+    return entries, nodes
+
+
+@isolated
+class LeaderboardTests(IsolatedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.participants = [make_participant(n) for n in range(5)]
+
+    def ranks(self):
+        return [rank_of(p) for p in self.participants]
+
+    def test_rank_counts_higher_scores_and_shares_ties(self):
+        for participant, points in zip(self.participants, [30, 10, 30, 0, 5]):
+            award_points(participant, points)
+        self.assertEqual(self.ranks(), [1, 3, 1, 5, 4])
+
+        award_points(self.participants[1], 25)
+        self.assertEqual(self.ranks(), [2, 1, 2, 5, 4])
+
+    def test_negative_scores_share_the_lowest_slot(self):
+        award_points(self.participants[0], 10)
+        award_points(self.participants[1], -5)
+        award_points(self.participants[2], 0)
+        self.assertEqual(self.ranks()[:3], [1, 2, 2])
+        self.assertIsNone(rank_of(self.participants[3]))
+
+    def test_bulk_update_matches_one_at_a_time(self):
+        deltas = [{0: 10, 1: 20}, {1: -20, 2: 7, 3: 0}, {0: 5, 2: 7, 4: 1}]
+        for batch in deltas:
+            for i, delta in batch.items():
+                add_score(self.participants[i].pk, GLOBAL, delta)
+        one_at_a_time = leaderboard_state()
+
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardNode.objects.all().delete()
+        for batch in deltas:
+            add_scores(GLOBAL, {self.participants[i].pk: delta for i, delta in batch.items()})
+        self.assertEqual(leaderboard_state(), one_at_a_time)
+
+    def test_rebuild_matches_incremental_updates(self):
+        event = make_event(place='river', date=date.today() - timedelta(days=40))
+        for participant, points in zip(self.participants, [12, 3, 12, 40, 1]):
+            award_points(participant, points, event=event)
+            award_points(participant, points // 2)
+        incremental = leaderboard_state()
+
+        rebuild_leaderboards()
+        self.assertEqual(leaderboard_state(), incremental)
+        self.assertEqual(self.ranks(), [2, 4, 2, 1, 5])
+
+
+@isolated
+@override_settings(
+    LOGIN_THROTTLE_RATES={'ip': (30, 600), 'identifier': (5, 600)}, REGISTRATION_THROTTLE_RATE=(2, 3600),
+)
+class ThrottleTests(IsolatedTestCase):
+
+    def request(self, ip='203.0.113.1'):
+        return RequestFactory().post('/login/', REMOTE_ADDR=ip)
+
+    def test_previous_bucket_fades_out_across_the_window(self):
+        throttle = SlidingWindowThrottle('test', limit=3, window=60)
+        for second in (0, 10, 20):
+            throttle.hit('x', now=second)
+        self.assertTrue(throttle.is_limited('x', now=30))
+        # Halfway into the next bucket, half of the previous one still counts.
+        self.assertEqual(throttle.count('x', now=90), 1.5)
+        self.assertFalse(throttle.is_limited('x', now=90))
+        self.assertEqual(throttle.count('x', now=120), 0)
+
+    def test_identifier_locks_after_its_limit_whatever_the_address(self):
+        for n in range(5):
+            self.assertFalse(login_blocked(self.request(f'203.0.113.{n}'), 'Volunteer1@example.com'))
+            record_login_failure(self.request(f'203.0.113.{n}'), 'Volunteer1@example.com')
+
+        self.assertTrue(login_blocked(self.request('198.51.100.7'), ' volunteer1@example.com '))
+        self.assertFalse(login_blocked(self.request('198.51.100.7'), 'someone-else'))
+        self.assertEqual(
+            list(LoginAttempt.objects.values_list('username', 'attempts')), [('volunteer1@example.com', 5)]
+        )
+
+        clear_login_failures('volunteer1@example.com')
+        self.assertFalse(login_blocked(self.request(), 'volunteer1@example.com'))
+
+    def test_blocked_login_is_rejected_before_authenticating(self):
+        for _ in range(5):
+            record_login_failure(self.request(), 'volunteer1')
+        make_participant()
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.client.post(
+                '/login/', {'identifier': 'volunteer1', 'password': 'anything'}, REMOTE_ADDR='203.0.113.1',
+            )
+        self.assertEqual(response.status_code, 429)
+
+    def test_registration_allowance_is_per_address(self):
+        self.assertEqual([registration_blocked(self.request()) for _ in range(3)], [False, False, True])
+        self.assertFalse(registration_blocked(self.request('198.51.100.7')))
+
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@isolated
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class AccountBackendTests(IsolatedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.volunteer = make_participant(password=make_password('volunteer-pass'))
+        self.admin = User.objects.create_user('organizer', 'organizer@example.com', 'admin-pass', is_staff=True)
+
+    def test_email_finds_the_volunteer(self):
+        account = authenticate(identifier='  Volunteer1@Example.com ', password='volunteer-pass')
+        self.assertEqual(account, self.volunteer)
+        self.assertIsInstance(account, Participant)
+
+    def test_username_finds_staff_only(self):
+        self.assertEqual(authenticate(identifier='organizer', password='admin-pass'), self.admin)
+        User.objects.create_user('helper', password='helper-pass')
+        self.assertIsNone(authenticate(identifier='helper', password='helper-pass'))
+
+    def test_email_shaped_staff_username_falls_back_to_users(self):
+        admin = User.objects.create_user('ops@example.com', password='ops-pass', is_staff=True)
+        self.assertEqual(authenticate(identifier='ops@example.com', password='ops-pass'), admin)
+
+    def test_wrong_password_and_unknown_accounts_hash_once(self):
+        for identifier, password in [('volunteer1@example.com', 'wrong'), ('nobody@example.com', 'x'),
+                                     ('nobody', 'x')]:
+            with mock.patch('myapp.backends.make_password', wraps=make_password) as dummy_hash, \
+                    mock.patch('myapp.backends.check_password', wraps=check_password) as real_check:
+                self.assertIsNone(authenticate(identifier=identifier, password=password))
+            self.assertEqual(dummy_hash.call_count + real_check.call_count, 1, identifier)
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.SHA1PasswordHasher', *FAST_HASHERS])
+    def test_outdated_hash_is_upgraded_on_login(self):
+        self.assertTrue(self.volunteer.password.startswith('md5$'))
+        authenticate(identifier='volunteer1@example.com', password='volunteer-pass')
+        self.volunteer.refresh_from_db()
+        self.assertTrue(self.volunteer.password.startswith('sha1$'))
+        self.assertTrue(self.volunteer.check_password('volunteer-pass'))
+
+
+def jsonl(*rows):
+    return read_rows(io.StringIO('\n'.join(row if isinstance(row, str) else json.dumps(row) for row in rows)), 'jsonl')
+
+
+def volunteer_row(n, **fields):
+    row = {
+        'fullname': f'Imported {n}', 'username': f'imported{n}', 'email': f'imported{n}@example.com',
+        'contact_number': f'0918{n:07d}', 'address': 'Pasig', 'birthdate': '1990-05-01', 'password': 'secret-pass',
+    }
+    return {**row, **fields}
+
+
+@isolated
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class ImporterTests(IsolatedTestCase):
+
+    def run_import(self, importer_class, rows, batch_size=2):
+        rejections = []
+        importer = importer_class(batch_size=batch_size, workers=1, on_reject=rejections.append)
+        return importer.run(rows), {r.line: sorted(r.errors) for r in rejections}
+
+    def test_participant_rows_are_rejected_with_their_line(self):
+        make_participant(email='taken@example.com')
+        result, rejected = self.run_import(ParticipantImporter, jsonl(
+            volunteer_row(1),
+            volunteer_row(2, email='TAKEN@example.com'),
+            '{not json',
+            volunteer_row(4, username='imported1'),
+            volunteer_row(5, password=''),
+            volunteer_row(6, password='', password_hash='plaintext'),
+            volunteer_row(7, password='', password_hash=make_password('hashed-pass')),
+            '[1, 2]',
+        ))
+
+        self.assertEqual((result.read, result.created, result.rejected), (8, 2, 6))
+        self.assertEqual(rejected, {
+            2: ['email'], 3: ['__all__'], 4: ['username'], 5: ['__all__'], 6: ['password_hash'], 8: ['__all__'],
+        })
+        self.assertTrue(Participant.objects.get(username='imported7').check_password('hashed-pass'))
+
+    def test_dry_run_writes_nothing(self):
+        importer = ParticipantImporter(workers=1, dry_run=True)
+        self.assertEqual(importer.run(jsonl(volunteer_row(1))).created, 1)
+        self.assertFalse(Participant.objects.filter(username='imported1').exists())
+
+    def test_registration_rows_are_checked_against_seats_and_accounts(self):
+        event = make_event(max_participants=2)
+        first, second, third = (make_participant(n) for n in range(1, 4))
+        register_participant(first, event)
+
+        result, rejected = self.run_import(RegistrationImporter, jsonl(
+            {'participant_email': 'volunteer2@example.com', 'event_id': event.pk},
+            {'participant_email': 'volunteer1@example.com', 'event_id': event.pk},
+            {'participant_email': 'volunteer3@example.com', 'event_id': event.pk},
+            {'participant_email': 'nobody@example.com', 'event_id': event.pk},
+            {'participant_email': 'volunteer3@example.com', 'event_id': event.pk + 100},
+            {'participant_email': 'volunteer3@example.com', 'event_id': 'soon'},
+        ))
+
+        self.assertEqual((result.created, result.rejected), (1, 5))
+        self.assertEqual(rejected, {
+            2: ['__all__'], 3: ['__all__'], 4: ['participant_email'], 5: ['event_id'], 6: ['event_id'],
+        })
+        event.refresh_from_db()
+        self.assertEqual(event.registered_count, 2)
+
+
+@isolated
+class ApprovalTests(IsolatedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.event = make_event(points=15, date=date.today() - timedelta(days=1))
+        self.participants = [make_participant(n) for n in range(3)]
+        self.registrations = [register_participant(p, self.event).registration.pk for p in self.participants]
+
+    def test_approving_twice_awards_once(self):
+        first = approve_registrations(self.event, self.registrations)
+        second = approve_registrations(self.event, self.registrations)
+
+        self.assertEqual((first.awarded, first.newly_attended), (3, 3))
+        self.assertEqual((second.selected, second.awarded, second.newly_attended, second.newly_approved), (3, 0, 0, 0))
+        self.assertEqual(Activity.objects.filter(event=self.event).count(), 3)
+        self.assertEqual(set(Participant.objects.values_list('points', flat=True)), {15})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attended_count, 3)
+
+    def test_overlapping_selections_award_only_the_new_rows(self):
+        mark_attended(self.event, self.registrations[:2])
+        approve_registrations(self.event, self.registrations[:1])
+        result = approve_registrations(self.event, self.registrations)
+
+        self.assertEqual((result.awarded, result.newly_attended), (2, 1))
+        self.assertEqual(sorted(Activity.objects.values_list('participant_id', flat=True)),
+                         sorted(p.pk for p in self.participants))
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attended_count, 3)
+
+    def test_other_events_registrations_are_ignored(self):
+        other = make_event(2)
+        self.assertEqual(approve_registrations(other, self.registrations).selected, 0)
+        self.assertFalse(Activity.objects.exists())
+
+    def test_participant_list_is_staff_only(self):
+        url = f'/custom-admin/event-participants/{self.event.pk}/'
+        self.assertRedirects(self.client.get(url), f'/admin-login/?next={url}', fetch_redirect_response=False)
+        self.client.force_login(User.objects.create_user('helper', password='helper-pass'))
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(User.objects.create_user('organizer', password='admin-pass', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+def png_bytes():
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), 'green').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@isolated
+class ProofUploadTests(IsolatedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.incoming = os.path.join(media_root, INCOMING_DIR)
+        self.participant = make_participant()
+        self.registration = register_participant(self.participant, make_event()).registration
+        self.url = f'/registration/{self.registration.pk}/upload-proof/'
+
+    def client_for(self, participant=None, csrf_token=None):
+        """A client that passes CSRF checks the way a browser does, so the body really is parsed."""
+        request = RequestFactory().get('/')
+        token = get_token(request)
+        client = Client(enforce_csrf_checks=True)
+        client.cookies['csrftoken'] = request.META['CSRF_COOKIE']
+        client.csrf_token = token if csrf_token is None else csrf_token
+        if participant:
+            log_in_volunteer(client, participant)
+        return client
+
+    def post(self, client, content=None):
+        upload = SimpleUploadedFile('proof.png', content or png_bytes(), content_type='image/png')
+        return client.post(self.url, {
+            'proof_image': upload, 'proof_notes': 'Bags by the seawall', 'csrfmiddlewaretoken': client.csrf_token,
+        })
+
+    def leftovers(self):
+        return sorted(os.listdir(self.incoming)) if os.path.isdir(self.incoming) else []
+
+    def test_strangers_are_turned_away_before_the_body_is_stored(self):
+        self.assertEqual(self.post(self.client_for()).status_code, 302)
+        self.assertEqual(self.post(self.client_for(make_participant(2))).status_code, 404)
+        self.assertEqual(self.leftovers(), [])
+
+    def test_failed_csrf_check_leaves_nothing_behind(self):
+        client = self.client_for(self.participant, csrf_token='x' * 32)
+        with self.assertLogs('django.security.csrf', 'WARNING'):
+            self.assertEqual(self.post(client).status_code, 403)
+        self.assertEqual(self.leftovers(), [])
+
+    def test_rejected_file_is_deleted(self):
+        response = self.post(self.client_for(self.participant), content=b'not an image')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('proof_image', response.context['form'].errors)
+        self.assertEqual(self.leftovers(), [])
+
+    def test_attached_file_is_kept_under_its_hash(self):
+        self.assertEqual(self.post(self.client_for(self.participant)).status_code, 302)
+        self.registration.refresh_from_db()
+        self.assertEqual(self.leftovers(), [ProofImage.objects.get().sha256])
+        self.assertEqual(self.registration.proof.sha256, self.leftovers()[0])
+
+
+@isolated
+class SeedingTests(IsolatedTestCase):
+
+    def test_seeding_leaves_existing_rows_alone(self):
+        participant = make_participant()
+        event = make_event()
+        award_points(participant, 30)
+        # Stand-ins for rows a table-wide rebuild would rewrite.
+        CleanupEvent.objects.filter(pk=event.pk).update(registered_count=4)
+        Participant.objects.filter(pk=participant.pk).update(points=99)
+        before = leaderboard_state()
+
+        seed_dataset(events=20, participants=40, registrations=200, activities=30)
+
+        event.refresh_from_db()
+        participant.refresh_from_db()
+        self.assertEqual((event.registered_count, participant.points), (4, 99))
+        seeded_entries, _ = leaderboard_state()
+        self.assertTrue(before[0] <= seeded_entries)
+
+    def test_seeded_rows_get_their_derived_data(self):
+        seed_dataset(events=20, participants=40, registrations=200, activities=30)
+        seeded = (
+            leaderboard_state(),
+            set(Activity.objects.values_list('pk', 'balance_after')),
+            set(Participant.objects.values_list('pk', 'points')),
+            set(CleanupEvent.objects.values_list('pk', 'registered_count', 'attended_count')),
+        )
+
+        rebuild_ledger_balances()
+        rebuild_leaderboards()
+        recount_event_counters()
+        self.assertEqual((
+            leaderboard_state(),
+            set(Activity.objects.values_list('pk', 'balance_after')),
+            set(Participant.objects.values_list('pk', 'points')),
+            set(CleanupEvent.objects.values_list('pk', 'registered_count', 'attended_count')),
+        ), seeded)
+
+
+@isolated
+class NotificationTests(IsolatedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.participant = make_participant()
+        self.event = make_event()
+
+    def test_inbox_is_read_once_oldest_first(self):
+        first = notify(self.participant, Notification.REGISTERED, event=self.event)
+        second = notify(self.participant, Notification.POINTS, points=5, total=5)
+        notify(make_participant(2), Notification.POINTS, points=1, total=1)
+
+        self.assertEqual(take_unread(self.participant), [first, second])
+        self.assertEqual(take_unread(self.participant), [])
+
+    @override_settings(NOTIFICATION_INBOX_LIMIT=2)
+    def test_overflow_waits_for_the_next_visit(self):
+        sent = [notify(self.participant, Notification.POINTS, points=n, total=n) for n in range(3)]
+        self.assertEqual(take_unread(self.participant), sent[:2])
+        self.assertEqual(take_unread(self.participant), sent[2:])
+
+    def test_select_event_shows_the_registration_once(self):
+        log_in_volunteer(self.client, self.participant)
+        response = self.client.post('/select-event/', {'event': self.event.pk}, follow=True)
+        self.assertEqual(response.context['registration_success']['event_name'], self.event.name)
+        self.assertIsNone(self.client.get('/select-event/').context['registration_success'])
+
+    def test_points_notice_becomes_a_message(self):
+        notify(self.participant, Notification.POINTS, points=5, total=15)
+        log_in_volunteer(self.client, self.participant)
+        response = self.client.get('/select-event/')
+        self.assertIn('15 points', ' '.join(str(m) for m in get_messages(response.wsgi_request)))
+
+    def test_prune_removes_only_old_notifications(self):
+        old = notify(self.participant, Notification.POINTS, points=1, total=1)
+        Notification.objects.filter(pk=old.pk).update(created_at=old.created_at - timedelta(days=31))
+        recent = notify(self.participant, Notification.POINTS, points=2, total=3)
+
+        self.assertEqual(prune_notifications(), 1)
+        self.assertEqual(list(Notification.objects.all()), [recent])
+
+    def test_notifying_queues_one_prune_per_interval(self):
+        for n in range(3):
+            notify(self.participant, Notification.POINTS, points=n, total=n)
+        self.assertEqual(Job.objects.filter(name='myapp.notifications.prune_notifications').count(), 1)
+
+
+@isolated
+class PeriodicJobTests(IsolatedTestCase):
+
+    def test_one_job_per_interval(self):
+        with mock.patch('myapp.jobs.time.time', return_value=7200.0):
+            first = enqueue_periodically(prune_notifications, 3600)
+            self.assertIsNone(enqueue_periodically(prune_notifications, 3600))
+        with mock.patch('myapp.jobs.time.time', return_value=10800.0):
+            later = enqueue_periodically(prune_notifications, 3600)
+
+        self.assertEqual(list(Job.objects.order_by('pk')), [first, later])
+
+    def test_losing_the_insert_race_queues_nothing(self):
+        with mock.patch('myapp.jobs.time.time', return_value=7200.0):
+            enqueue_periodically(prune_notifications, 3600)
+            # The other caller's row appears after our lookup.
+            with mock.patch('django.db.models.query.QuerySet.exists', return_value=False):
+                self.assertIsNone(enqueue_periodically(prune_notifications, 3600))
+        self.assertEqual(Job.objects.count(), 1)
+
+
+# Outermost, so it wins over isolated's PAGE_CACHE_TIMEOUT=0.
+@override_settings(PAGE_CACHE_TIMEOUT=60)
+@isolated
+class PageCacheTests(IsolatedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        make_event(date=date.today() - timedelta(days=3))
+
+    def queries_for(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(captured.captured_queries)
+
+    def test_pages_are_keyed_on_the_params_the_view_reads(self):
+        self.assertGreater(self.queries_for('/previous-events/?q=manila&date=2020-01-01'), 0)
+        self.assertEqual(self.queries_for('/previous-events/?date=2020-01-01&q=manila'), 0)
+        self.assertGreater(self.queries_for('/previous-events/?q=beach'), 0)
+
+    def test_unknown_params_bypass_the_cache(self):
+        self.queries_for('/previous-events/')
+        for n in range(2):
+            self.assertGreater(self.queries_for('/previous-events/?junk=1'), 0)
+        self.assertEqual(self.queries_for('/previous-events/'), 0)
+
+
+@isolated
+@override_settings(EVENT_FEED_UPCOMING_LIMIT=3)
+class EventFeedTests(IsolatedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        today = date.today()
+        # Two events share a day so the cursor has to break the tie on start time.
+        self.upcoming = [
+            make_event(n, date=today + timedelta(days=(n + 1) // 2), start_time=time(6 + n))
+            for n in range(1, 8)
+        ]
+
+    def test_upcoming_bucket_is_capped_with_a_cursor(self):
+        feed = build_event_feed(date.today())
+        self.assertEqual(feed.upcoming, self.upcoming[:3])
+        self.assertIsNotNone(feed.upcoming_cursor)
+
+    def test_cursor_pages_through_the_rest_in_order(self):
+        seen = build_event_feed(date.today()).upcoming
+        cursor = build_event_feed(date.today()).upcoming_cursor
+        while cursor:
+            page = upcoming_page(cursor)
+            seen += page.items
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.upcoming)
+
+    def test_event_list_renders(self):
+        response = self.client.get('/event-history/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['upcoming_events']), self.upcoming[:3])
+
+
+@skipUnless(connection.vendor in ('sqlite', 'postgresql'), 'plan checks need SQLite or PostgreSQL')
+@isolated
+class QueryPlanTests(TestCase):
+    """Every query a hot view issues must use an index; a full table scan fails the suite."""
+
+    # Big enough that the planner prefers the indexes it would use in production.
+    DATASET = {'events': 3000, 'participants': 5000, 'registrations': 40000, 'activities': 5000}
+
+    def test_hot_views_avoid_full_table_scans(self):
+        clients, event_id = seed_hot_paths(**self.DATASET)
+        failures = plan_regressions(clients, event_id)
+        if failures:
+            self.fail('\n'.join(
+                f'{label}: full scan of {table}: {detail}' if table else f'{label}: {detail}'
+                for label, table, detail in failures
+            ))
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite plan lines')
+    def test_index_ordered_scans_count_as_full_scans(self):
+        plan = [
+            'SCAN myapp_participant USING INDEX participant_registered_idx',
+            'SCAN myapp_cleanupevent_fts VIRTUAL TABLE INDEX 0:M3',
+            'SEARCH myapp_cleanupevent USING INDEX event_place_date_idx (place=?)',
+        ]
+        self.assertEqual([table for table, _ in full_scans(plan)], ['myapp_participant'])
@@ -0,0 +1,136 @@
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .jobs import enqueue_periodically, job
+from .models import LoginAttempt
+
+THROTTLE_CACHE_PREFIX = 'throttle'
+
+
+def login_rates():
+    # (limit, window seconds); the identifier limit mirrors LoginAttempt.is_locked().
+    return getattr(settings, 'LOGIN_THROTTLE_RATES', {'ip': (30, 600), 'identifier': (5, 600)})
+
+
+def registration_rate():
+    return getattr(settings, 'REGISTRATION_THROTTLE_RATE', (10, 3600))
+
+
+def client_ip(request):
+    """REMOTE_ADDR, or the address the n-th trusted proxy saw when behind a load balancer."""
+    proxies = getattr(settings, 'THROTTLE_PROXY_COUNT', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    if proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+        if hops:
+            return hops[-min(proxies, len(hops))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class SlidingWindowThrottle:
+    """
+    Approximate sliding-window counter kept entirely in the cache.
+
+    Hits land in fixed buckets of ``window`` seconds; the current count is the
+    current bucket plus the previous one weighted by how much of it still
+    overlaps the window. Two cache reads per check, one increment per hit.
+    """
+
+    def __init__(self, scope, limit, window):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+
+    def _key(self, value, bucket):
+        digest = hashlib.sha256(str(value).encode()).hexdigest()[:32]
+        return f'{THROTTLE_CACHE_PREFIX}:{self.scope}:{digest}:{bucket}'
+
+    def count(self, value, now=None):
+        now = time.time() if now is None else now
+        bucket, offset = divmod(now, self.window)
+        bucket = int(bucket)
+        counts = cache.get_many([self._key(value, bucket), self._key(value, bucket - 1)])
+        current = counts.get(self._key(value, bucket), 0)
+        previous = counts.get(self._key(value, bucket - 1), 0)
+        return current + previous * (1 - offset / self.window)
+
+    def is_limited(self, value, now=None):
+        return self.count(value, now) >= self.limit
+
+    def hit(self, value, now=None):
+        now = time.time() if now is None else now
+        key = self._key(value, int(now // self.window))
+        # Buckets live for two windows so the next one can still weigh them.
+        if not cache.add(key, 1, timeout=self.window * 2):
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Expired between add() and incr().
+                cache.set(key, 1, timeout=self.window * 2)
+        return self.count(value, now)
+
+    def reset(self, value, now=None):
+        now = time.time() if now is None else now
+        bucket = int(now // self.window)
+        cache.delete_many([self._key(value, bucket), self._key(value, bucket - 1)])
+
+
+def _login_throttles():
+    rates = login_rates()
+    return (
+        SlidingWindowThrottle('login:ip', *rates['ip']),
+        SlidingWindowThrottle('login:identifier', *rates['identifier']),
+    )
+
+
+def _normalize(identifier):
+    return (identifier or '').strip().lower()
+
+
+def login_blocked(request, identifier):
+    """Check before any password is hashed; True means reject the attempt outright."""
+    by_ip, by_identifier = _login_throttles()
+    return by_ip.is_limited(client_ip(request)) or by_identifier.is_limited(_normalize(identifier))
+
+
+def record_login_failure(request, identifier):
+    by_ip, by_identifier = _login_throttles()
+    identifier = _normalize(identifier)
+    by_ip.hit(client_ip(request))
+    attempts = by_identifier.hit(identifier)
+    if attempts - 1 < by_identifier.limit <= attempts:
+        # One row per lockout rather than per attempt, kept for the admin's audit trail.
+        LoginAttempt.objects.update_or_create(username=identifier[:150], defaults={'attempts': int(attempts)})
+        prune_login_attempts_periodically()
+
+
+def clear_login_failures(identifier):
+    _login_throttles()[1].reset(_normalize(identifier))
+
+
+def registration_blocked(request):
+    """Count the attempt and report whether this address has used up its allowance."""
+    throttle = SlidingWindowThrottle('register:ip', *registration_rate())
+    ip = client_ip(request)
+    if throttle.is_limited(ip):
+        return True
+    throttle.hit(ip)
+    return False
+
+
+@job(max_attempts=1)
+def prune_login_attempts(older_than=None):
+    """Delete lockout records that can no longer matter; returns the number removed."""
+    if older_than is None:
+        older_than = timedelta(days=getattr(settings, 'LOGIN_ATTEMPT_RETENTION_DAYS', 30))
+    deleted, _ = LoginAttempt.objects.filter(last_attempt__lt=timezone.now() - older_than).delete()
+    return deleted
+
+
+def prune_login_attempts_periodically():
+    return enqueue_periodically(prune_login_attempts, getattr(settings, 'LOGIN_ATTEMPT_PRUNE_INTERVAL', 60 * 60))
@@ -21,6 +21,13 @@ urlpatterns = [
     path('custom-admin/', views.custom_admin_panel, name='custom_admin_panel'),
     # Show participants of a specific event
 path('custom-admin/event-participants/<int:event_id>/', views.event_participants, name='event_participants'),
+    path('custom-admin/event-participants/<int:event_id>/approve/', views.bulk_approve, name='bulk_approve'),
+    path('custom-admin/registrations/<int:registration_id>/approve/', views.approve_registration,
+         name='approve_registration'),
+    path('registration/<int:registration_id>/upload-proof/', views.upload_proof, name='upload_proof'),
+    path('custom-admin/export/<str:kind>/', views.export_data, name='export_data'),
+    path('custom-admin/metrics/', views.metrics_dashboard, name='metrics_dashboard'),
+    path('metrics/', views.prometheus_metrics, name='prometheus_metrics'),
 path("admin-login/", views.admin_login, name="admin_login"),
 path("admin-logout/", views.admin_logout, name="admin_logout"),
 
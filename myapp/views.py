@@ -1,30 +1,123 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.urls import reverse
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import logout, authenticate, login
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.contrib.auth.hashers import make_password, check_password
-from django.core.exceptions import FieldError
-from django.db.models import Q, Count
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import require_POST
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import FieldError, ValidationError
+from django.db.models import OuterRef, Q, Subquery, Sum
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from datetime import date, datetime
-import time
+from urllib.parse import urlencode
 import json
 
-from .forms import CleanupEventForm, ParticipantForm, ParticipantRegistrationForm, VolunteerLoginForm
-from .models import Participant, CleanupEvent, CleanupRegistration, Activity
+from .approvals import approve_registrations, mark_attended
+from .event_feed import PREVIOUS_ORDERING, get_event_feed, upcoming_page
+from .exports import EVENT_REQUIRED, EXPORTS, FORMATS as EXPORT_FORMATS, buffered, render_lines
+from .forms import CleanupEventForm, ParticipantForm, ParticipantRegistrationForm, ProofUploadForm, VolunteerLoginForm
+from .history import combined_history_page
+from .leaderboard import rank_of
+from .metrics import collect, prometheus_text, sample_rate as metrics_sample_rate
+from .models import Participant, CleanupEvent, CleanupRegistration, Activity, Notification
+from .notifications import notify, registration_details, take_unread
+from .page_cache import cache_public_page
+from .pagination import keyset_paginate, url_prefix
+from .participants import login_participant, logout_participant
+from .points import award_points, get_points_summary
+from .proofs import ProofUploadHandler, attach_proof, discard_upload, max_upload_bytes
+from .registration import RegistrationStatus, register_participant
+from .search import search_events
+from .throttling import clear_login_failures, login_blocked, record_login_failure, registration_blocked
+
+
+ADMIN_PANEL_PAGE_SIZE = getattr(settings, 'ADMIN_PANEL_PAGE_SIZE', 25)
+PREVIOUS_EVENTS_PAGE_SIZE = getattr(settings, 'PREVIOUS_EVENTS_PAGE_SIZE', 20)
+COMBINED_HISTORY_PAGE_SIZE = getattr(settings, 'COMBINED_HISTORY_PAGE_SIZE', 20)
+
+EVENT_SORTS = {
+    'date_desc': ('-date', '-id'),
+    'date_asc': ('date', 'id'),
+}
+PARTICIPANT_SORTS = {
+    'newest': ('-registered_at', '-id'),
+    'oldest': ('registered_at', 'id'),
+}
+
+TOO_MANY_ATTEMPTS = "Too many login attempts. Please wait a few minutes and try again."
 
 
 @user_passes_test(lambda u: u.is_staff, login_url='myapp:admin_login')
 def custom_admin_panel(request):
-    # Update activity timestamp on each page visit
-    request.session['admin_last_activity'] = time.time()
-    
-    events = CleanupEvent.objects.all().order_by('-date')
-    participants = Participant.objects.all()
+    event_sort = request.GET.get('event_sort', 'date_desc')
+    if event_sort not in EVENT_SORTS:
+        event_sort = 'date_desc'
+    event_q = request.GET.get('event_q', '').strip()
+    event_place = request.GET.get('event_place', '').strip()
+
+    events = CleanupEvent.objects.only('id', 'name', 'date')
+    if event_q:
+        events = events.filter(name__icontains=event_q)
+    if event_place in dict(CleanupEvent.PLACE_CHOICES):
+        events = events.filter(place=event_place)
+    else:
+        event_place = ''
+    events_page = keyset_paginate(
+        events, EVENT_SORTS[event_sort], request.GET.get('events_cursor'), ADMIN_PANEL_PAGE_SIZE
+    )
+
+    participant_sort = request.GET.get('participant_sort', 'newest')
+    if participant_sort not in PARTICIPANT_SORTS:
+        participant_sort = 'newest'
+    participant_q = request.GET.get('participant_q', '').strip()
+
+    participants = Participant.objects.only('id', 'fullname', 'points', 'registered_at')
+    if participant_q:
+        participants = participants.filter(
+            Q(fullname__icontains=participant_q) | Q(email__istartswith=participant_q)
+        )
+    participants_page = keyset_paginate(
+        participants, PARTICIPANT_SORTS[participant_sort],
+        request.GET.get('participants_cursor'), ADMIN_PANEL_PAGE_SIZE
+    )
+
+    def page_link(param, cursor):
+        query = request.GET.copy()
+        if cursor:
+            query[param] = cursor
+        else:
+            query.pop(param, None)
+        return '?' + query.urlencode()
 
     return render(request, 'myapp/custom_admin_panel.html', {
-        'events': events,
-        'participants': participants,
+        'events': events_page.items,
+        'participants': participants_page.items,
+        'events_next_url': page_link('events_cursor', events_page.next_cursor) if events_page.has_next else None,
+        'events_first_url': page_link('events_cursor', None) if request.GET.get('events_cursor') else None,
+        'participants_next_url': (
+            page_link('participants_cursor', participants_page.next_cursor) if participants_page.has_next else None
+        ),
+        'participants_first_url': (
+            page_link('participants_cursor', None) if request.GET.get('participants_cursor') else None
+        ),
+        'event_sort': event_sort,
+        'event_q': event_q,
+        'event_place': event_place,
+        'place_choices': CleanupEvent.PLACE_CHOICES,
+        'participant_sort': participant_sort,
+        'participant_q': participant_q,
+        'urls': {
+            'edit_event': url_prefix('myapp:edit_event'),
+            'delete_event': url_prefix('myapp:delete_event'),
+            'event_participants': url_prefix('myapp:event_participants'),
+            'edit_participant': url_prefix('myapp:edit_participant'),
+            'delete_participant': url_prefix('myapp:delete_participant'),
+            'give_points': url_prefix('myapp:give_points'),
+        },
     })
 
 
@@ -33,13 +126,18 @@ def admin_login(request):
         username = request.POST.get("username")
         password = request.POST.get("password")
 
+        if login_blocked(request, username):
+            messages.error(request, TOO_MANY_ATTEMPTS)
+            return render(request, "myapp/admin_login.html", status=429)
+
         user = authenticate(request, username=username, password=password)
 
         if user is not None and user.is_staff:
+            clear_login_failures(username)
             login(request, user)
-            request.session['admin_last_activity'] = time.time()
             return redirect('myapp:custom_admin_panel')
         else:
+            record_login_failure(request, username)
             messages.error(request, "Invalid admin credentials")
 
     return render(request, "myapp/admin_login.html")
@@ -51,20 +149,92 @@ def admin_logout(request):
     return redirect('myapp:admin_login')
 
 
+@user_passes_test(lambda u: u.is_staff, login_url='myapp:admin_login')
 def event_participants(request, event_id):
     event = get_object_or_404(CleanupEvent, id=event_id)
-    participants = Participant.objects.filter(cleanupregistration__event=event)
+    registrations = (
+        CleanupRegistration.objects.filter(event=event)
+        .select_related('participant', 'proof')
+        .only(
+            'attended', 'approved', 'points_awarded', 'proof_notes', 'participant__fullname', 'participant__points',
+            'proof__status', 'proof__thumbnail', 'proof__display',
+        )
+        .order_by('registered_at', 'id')
+    )
 
     context = {
         'event': event,
-        'participants': participants,
+        'registrations': registrations,
     }
     return render(request, 'myapp/event_participants.html', context)
 
 
+@require_POST
+@user_passes_test(lambda u: u.is_staff, login_url='myapp:admin_login')
+def bulk_approve(request, event_id):
+    event = get_object_or_404(CleanupEvent, id=event_id)
+    registration_ids = [pk for pk in request.POST.getlist('registrations') if pk.isdigit()]
+    if not registration_ids:
+        messages.warning(request, "Select at least one participant first.")
+    elif request.POST.get('action') == 'attend':
+        result = mark_attended(event, registration_ids)
+        messages.success(request, f"Marked {result.newly_attended} of {result.selected} participant(s) as attended.")
+    else:
+        result = approve_registrations(event, registration_ids, approved_by=request.user)
+        messages.success(
+            request,
+            f"Approved {result.selected} participant(s); awarded {event.points} points to {result.awarded}."
+        )
+    return redirect('myapp:event_participants', event_id=event.id)
+
+
+@user_passes_test(lambda u: u.is_staff, login_url='myapp:admin_login')
+def export_data(request, kind):
+    if kind not in EXPORTS:
+        raise Http404("Unknown export")
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return HttpResponseBadRequest("format must be csv or jsonl")
+
+    event = None
+    if request.GET.get('event'):
+        if not request.GET['event'].isdigit():
+            return HttpResponseBadRequest("event must be an event id")
+        event = get_object_or_404(CleanupEvent.objects.only('id'), id=request.GET['event'])
+    elif kind in EVENT_REQUIRED:
+        return HttpResponseBadRequest("This export needs an event")
+
+    export = EXPORTS[kind](event) if event is not None else EXPORTS[kind]()
+    response = StreamingHttpResponse(buffered(render_lines(export, fmt)), content_type=EXPORT_FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{export.name}.{fmt}"'
+    return response
+
+
+@user_passes_test(lambda u: u.is_staff, login_url='myapp:admin_login')
+def metrics_dashboard(request):
+    rows = [
+        {
+            'view': view, 'method': method, 'status': status, 'count': stats.count,
+            'mean_ms': stats.seconds / stats.count * 1000, 'p95': stats.quantile(0.95),
+            'total_s': stats.seconds, 'queries': stats.queries / stats.count,
+            'sql_ms': stats.sql_seconds / stats.count * 1000, 'kb': stats.response_bytes / stats.count / 1024,
+        }
+        for (view, method, status), stats in collect().items() if stats.count
+    ]
+    rows.sort(key=lambda row: row['total_s'], reverse=True)
+    return render(request, 'myapp/metrics.html', {'rows': rows, 'sample_rate': metrics_sample_rate()})
+
+
+def prometheus_metrics(request):
+    # Scrapers send METRICS_TOKEN as a bearer token; staff can also look from a browser.
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not (token and constant_time_compare(supplied, token)) and not request.user.is_staff:
+        raise Http404()
+    return HttpResponse(prometheus_text(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 def add_event(request):
-    request.session['admin_last_activity'] = time.time()
-    
     if request.method == 'POST':
         form = CleanupEventForm(request.POST)
         if form.is_valid():
@@ -82,8 +252,6 @@ def add_event(request):
 
 
 def edit_event(request, event_id):
-    request.session['admin_last_activity'] = time.time()
-    
     event = get_object_or_404(CleanupEvent, id=event_id)
     if request.method == 'POST':
         form = CleanupEventForm(request.POST, instance=event)
@@ -97,8 +265,6 @@ def edit_event(request, event_id):
 
 
 def delete_event(request, event_id):
-    request.session['admin_last_activity'] = time.time()
-    
     event = get_object_or_404(CleanupEvent, id=event_id)
     event.delete()
     messages.success(request, "Event deleted successfully!")
@@ -106,8 +272,6 @@ def delete_event(request, event_id):
 
 
 def add_participant(request):
-    request.session['admin_last_activity'] = time.time()
-    
     if request.method == 'POST':
         form = ParticipantRegistrationForm(request.POST)
         if form.is_valid():
@@ -120,8 +284,6 @@ def add_participant(request):
 
 
 def edit_participant(request, participant_id):
-    request.session['admin_last_activity'] = time.time()
-    
     participant = get_object_or_404(Participant, id=participant_id)
     if request.method == 'POST':
         form = ParticipantRegistrationForm(request.POST, instance=participant)
@@ -135,8 +297,6 @@ def edit_participant(request, participant_id):
 
 
 def delete_participant(request, participant_id):
-    request.session['admin_last_activity'] = time.time()
-    
     participant = get_object_or_404(Participant, id=participant_id)
 
     if request.method == "POST":
@@ -147,19 +307,17 @@ def delete_participant(request, participant_id):
 
 
 def give_points(request, participant_id):
-    request.session['admin_last_activity'] = time.time()
-    
     participant = get_object_or_404(Participant, id=participant_id)
     if request.method == 'POST':
         points = int(request.POST.get('points', 0))
-        participant.points += points
-        participant.save()
-        
-        request.session[f'points_added_{participant.email}'] = {
-            'points': points,
-            'total_points': participant.points
-        }
-        
+        award_points(
+            participant, points,
+            description='Awarded by admin',
+            awarded_by=request.user if request.user.is_authenticated else None,
+        )
+        # Shown to the volunteer on their next visit, not stored in the admin's session.
+        notify(participant, Notification.POINTS, points=points, total=participant.points)
+
         messages.success(request, f"{points} points added to {participant.fullname}.")
         return redirect('myapp:custom_admin_panel')
 
@@ -167,25 +325,7 @@ def give_points(request, participant_id):
 
 
 def select_event(request):
-    participant = None
-    participant_email = request.session.get('participant_email')
-    if participant_email:
-        try:
-            participant = Participant.objects.get(email=participant_email)
-        except Participant.DoesNotExist:
-            participant = None
-
-    today = date.today()
-
-    previous_events = CleanupEvent.objects.filter(date__lt=today).annotate(
-        registered_count=Count('cleanupregistration')
-    ).order_by('-date')
-    current_events = CleanupEvent.objects.filter(date=today).annotate(
-        registered_count=Count('cleanupregistration')
-    ).order_by('start_time')
-    upcoming_events = CleanupEvent.objects.filter(date__gt=today).annotate(
-        registered_count=Count('cleanupregistration')
-    ).order_by('date')
+    participant = request.participant
 
     if request.method == 'POST' and participant:
         event_id = request.POST.get('event')
@@ -193,52 +333,51 @@ def select_event(request):
             messages.error(request, "Please select an event first.")
         else:
             event = get_object_or_404(CleanupEvent, id=event_id)
+            result = register_participant(participant, event)
 
-            already_registered = CleanupRegistration.objects.filter(
-                participant=participant, event=event
-            ).exists()
-
-            if already_registered:
+            if result.status is RegistrationStatus.ALREADY_REGISTERED:
                 messages.warning(request, "You have already registered for this event.")
+            elif result.status is RegistrationStatus.FULL:
+                messages.error(request, "Sorry, this event is already full.")
             else:
-                CleanupRegistration.objects.create(participant=participant, event=event)
-                request.session['registration_success'] = {
-                    'event_name': event.name,
-                    'event_place': event.place,
-                    'event_specific_location': event.specific_location,
-                    'event_date': event.date.strftime("%B %d, %Y"),
-                    'event_start_time': event.start_time.strftime("%I:%M %p"),
-                    'event_duration': event.duration,
-                    'event_points': event.points
-                }
+                notify(participant, Notification.REGISTERED, event=event)
                 return redirect('myapp:select_event')
 
-    registration_success = request.session.pop('registration_success', None) if request.method == 'GET' else None
+    registration_success = None
+    if participant and request.method == 'GET':
+        for notification in take_unread(participant):
+            if notification.kind == Notification.REGISTERED:
+                registration_success = registration_details(notification.event)
+            elif notification.kind == Notification.POINTS:
+                messages.success(request, f"🎉 {notification.payload['points']} points have been added! "
+                                          f"Your total is now {notification.payload['total']} points.")
+    feed = get_event_feed()
+    upcoming_events, upcoming_cursor = feed.upcoming, feed.upcoming_cursor
+    if request.GET.get('upcoming'):
+        page = upcoming_page(request.GET['upcoming'], feed.day)
+        upcoming_events, upcoming_cursor = page.items, page.next_cursor
 
     context = {
         'participant': participant,
-        'previous_events': previous_events,
-        'current_events': current_events,
+        'previous_events': feed.previous,
+        'previous_cursor': feed.previous_cursor,
+        'current_events': feed.current,
         'upcoming_events': upcoming_events,
+        'upcoming_cursor': upcoming_cursor,
         'registration_success': registration_success
     }
     return render(request, 'myapp/select_event.html', context)
 
 
+@cache_public_page('events', params=('q', 'date', 'cursor'))
 def previous_events_list(request):
     today = date.today()
-    events = CleanupEvent.objects.filter(date__lt=today).order_by('-date')
+    events = CleanupEvent.objects.filter(date__lt=today)
 
     search_query = request.GET.get('q', '').strip()
     date_filter = request.GET.get('date', '').strip()
 
-    if search_query:
-        events = events.filter(
-            Q(name__icontains=search_query) |
-            Q(place__icontains=search_query) |
-            Q(specific_location__icontains=search_query)
-        )
-
+    filter_date = None
     if date_filter:
         try:
             filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
@@ -246,31 +385,51 @@ def previous_events_list(request):
         except ValueError:
             date_filter = ''
 
+    cursor = request.GET.get('cursor')
+    if search_query:
+        page = search_events(search_query, today, filter_date, cursor, PREVIOUS_EVENTS_PAGE_SIZE)
+    else:
+        page = keyset_paginate(events, PREVIOUS_ORDERING, cursor, PREVIOUS_EVENTS_PAGE_SIZE)
+
+    next_url = None
+    if page.has_next:
+        query = request.GET.copy()
+        query['cursor'] = page.next_cursor
+        next_url = '?' + query.urlencode()
+
     context = {
-        'events': events,
+        'events': page.items,
+        'next_url': next_url,
         'search_query': search_query,
         'date_filter': date_filter,
     }
     return render(request, 'myapp/previous_events.html', context)
 
 
+@cache_public_page('events', params=('cursor',))
 def event_list(request):
-    today = date.today()
-
-    previous_events = CleanupEvent.objects.filter(date__lt=today).order_by('-date')
-    current_events = CleanupEvent.objects.filter(date=today).order_by('start_time')
-    upcoming_events = CleanupEvent.objects.filter(date__gt=today).order_by('date')
+    feed = get_event_feed()
+    upcoming_events, upcoming_cursor = feed.upcoming, feed.upcoming_cursor
+    if request.GET.get('cursor'):
+        page = upcoming_page(request.GET['cursor'], feed.day)
+        upcoming_events, upcoming_cursor = page.items, page.next_cursor
 
     context = {
-        'previous_events': previous_events,
-        'current_events': current_events,
+        'previous_events': feed.previous,
+        'previous_cursor': feed.previous_cursor,
+        'current_events': feed.current,
         'upcoming_events': upcoming_events,
+        'upcoming_cursor': upcoming_cursor,
     }
     return render(request, 'myapp/event_list.html', context)
 
 
 def register(request):
     if request.method == 'POST':
+        if registration_blocked(request):
+            messages.error(request, "Too many registrations from your network. Please try again later.")
+            return render(request, 'myapp/register.html', {'form': ParticipantRegistrationForm()}, status=429)
+
         form = ParticipantRegistrationForm(request.POST)
         if form.is_valid():
             try:
@@ -299,33 +458,35 @@ def volunteer_login(request):
         identifier = form.cleaned_data['identifier'].strip()
         raw_pw = form.cleaned_data['password'].strip()
 
-        admin_user = authenticate(request, username=identifier, password=raw_pw)
-        if admin_user and admin_user.is_staff:
-            login(request, admin_user)
-            request.session.pop('participant_email', None)
-            request.session['admin_last_activity'] = time.time()
+        if login_blocked(request, identifier):
+            messages.error(request, TOO_MANY_ATTEMPTS)
+            return render(request, 'myapp/volunteer_login.html', {'form': form}, status=429)
+
+        account = authenticate(request, identifier=identifier, password=raw_pw)
+        if isinstance(account, Participant):
+            clear_login_failures(identifier)
+            login_participant(request, account)
+            messages.success(request, "Login successful! Select your event below.")
+            return redirect('myapp:select_event')
+        if account is not None:
+            clear_login_failures(identifier)
+            login(request, account)
+            logout_participant(request)
             messages.success(request, "Welcome back, admin!")
             return redirect('myapp:custom_admin_panel')
 
-        email_identifier = identifier.strip().lower()
-        try:
-            participant = Participant.objects.get(email__iexact=email_identifier)
-        except Participant.DoesNotExist:
-            messages.error(request, "Invalid credentials. Please check your email/username and password.")
-        else:
-            if check_password(raw_pw, participant.password):
-                request.session['participant_email'] = participant.email
-                messages.success(request, "Login successful! Select your event below.")
-                return redirect('myapp:select_event')
-            messages.error(request, "Invalid credentials. Please check your email/username and password.")
+        record_login_failure(request, identifier)
+        messages.error(request, "Invalid credentials. Please check your email/username and password.")
 
     return render(request, 'myapp/volunteer_login.html', {'form': form})
 
 
+@cache_public_page()
 def home(request):
     return render(request, 'myapp/home.html')
 
 
+@cache_public_page()
 def about(request):
     return render(request, 'myapp/about.html')
 
@@ -348,13 +509,62 @@ def status_lookup(request):
     return render(request, 'myapp/status_lookup.html')
 
 
+@csrf_exempt
 def upload_proof(request, registration_id):
-    return render(request, 'myapp/upload_proof.html', {'registration_id': registration_id})
+    # Only the session is consulted here, so a stranger's POST is turned away
+    # before a single byte of it is written to disk.
+    participant = request.participant
+    if not participant:
+        return redirect('myapp:volunteer_login')
+    registration = get_object_or_404(
+        CleanupRegistration.objects.select_related('event'), id=registration_id, participant=participant
+    )
+
+    # Upload handlers can only be swapped before the body is read, hence the
+    # csrf_exempt/csrf_protect pair recommended by the Django docs.
+    handler = ProofUploadHandler(request)
+    request.upload_handlers = [handler]
+    try:
+        return _upload_proof(request, registration)
+    finally:
+        # Whatever was not attached (invalid form, failed CSRF check, error) is
+        # deleted; attach_proof() has already moved or removed what it took.
+        for upload in handler.uploads:
+            discard_upload(upload)
+
+
+@csrf_protect
+def _upload_proof(request, registration):
+    form = ProofUploadForm()
+    if request.method == 'POST':
+        # Bind even when the body is empty: an oversized file leaves nothing in FILES.
+        form = ProofUploadForm(request.POST, request.FILES)
+        try:
+            if request.upload_handlers[0].too_large:
+                # The file was dropped mid-stream; say why instead of "This field is required."
+                form.full_clean()
+                form.errors.pop('proof_image', None)
+                form.add_error('proof_image', f"Photos must be smaller than {max_upload_bytes() // (1024 * 1024)} MB.")
+            elif form.is_valid():
+                attach_proof(registration, form.cleaned_data['proof_image'], form.cleaned_data['proof_notes'])
+                messages.success(request, "Thanks! Your proof was uploaded and is waiting for review.")
+                return redirect('myapp:select_event')
+        except ValidationError as exc:
+            form.add_error('proof_image', exc)
+
+    return render(request, 'myapp/upload_proof.html', {'registration': registration, 'form': form})
 
 
+@require_POST
+@user_passes_test(lambda u: u.is_staff, login_url='myapp:admin_login')
 def approve_registration(request, registration_id):
-    messages.success(request, f'Registration {registration_id} approved!')
-    return redirect('myapp:home')
+    registration = get_object_or_404(CleanupRegistration.objects.select_related('event'), id=registration_id)
+    result = approve_registrations(registration.event, [registration.pk], approved_by=request.user)
+    if result.awarded:
+        messages.success(request, f'Registration {registration_id} approved!')
+    else:
+        messages.info(request, f'Registration {registration_id} was already approved.')
+    return redirect('myapp:event_participants', event_id=registration.event_id)
 
 
 def registration_success(request, event_id):
@@ -363,85 +573,72 @@ def registration_success(request, event_id):
 
 
 def points_history(request):
-    participant_email = request.session.get('participant_email')
-    if not participant_email:
-        return render(request, 'myapp/points_history.html', {'points_history': [], 'total_points': 0})
-
-    try:
-        participant = Participant.objects.get(email=participant_email)
-    except Participant.DoesNotExist:
+    participant = request.participant
+    if not participant:
         return render(request, 'myapp/points_history.html', {'points_history': [], 'total_points': 0})
 
-    registrations = CleanupRegistration.objects.filter(participant=participant, attended=True)
+    # What the ledger actually credited for each event, not the event's current points.
+    credited = (
+        Activity.objects.filter(participant=participant, event=OuterRef('event_id'))
+        .order_by().values('event').annotate(total=Sum('points_earned')).values('total')
+    )
+    registrations = (
+        CleanupRegistration.objects.filter(participant=participant, attended=True)
+        .annotate(credited=Subquery(credited))
+        .select_related('event', 'approved_by')
+        .only(
+            'registered_at', 'attended', 'approved', 'approved_at', 'points_awarded',
+            'event__name', 'event__place', 'event__date', 'event__points',
+            'approved_by__username', 'approved_by__email',
+        )
+    )
     points_history_data = []
-    total_points = 0
-    
+
     for reg in registrations:
-        awarded_by = "Not yet awarded"
-        awarded_at = None
-        
-        if reg.points_awarded and reg.approved:
+        awarded = reg.points_awarded and reg.approved
+        if awarded:
             if reg.approved_by:
-                awarded_by = reg.approved_by.username if reg.approved_by.username else reg.approved_by.email
+                awarded_by = reg.approved_by.username or reg.approved_by.email
             else:
                 awarded_by = "Admin"
-            awarded_at = reg.approved_at
-            event_points = reg.event.points
-            total_points += event_points
         else:
-            event_points = 0
-        
+            awarded_by = "Not yet awarded"
+
         points_history_data.append({
             'event': reg.event,
-            'points': event_points,
+            'points': (reg.credited or 0) if awarded else 0,
             'awarded_by': awarded_by,
-            'awarded_at': awarded_at,
+            'awarded_at': reg.approved_at if awarded else None,
             'registered_at': reg.registered_at,
-            'points_awarded': reg.points_awarded and reg.approved
+            'points_awarded': awarded
         })
 
+    summary = get_points_summary(participant)
+
     return render(request, 'myapp/points_history.html', {
         'points_history': points_history_data,
-        'total_points': total_points
+        'total_points': summary.total_awarded,
+        'pending_count': summary.pending_count,
+        'last_awarded_at': summary.last_awarded_at,
+        'rank': rank_of(participant),
     })
 
 
 def combined_list(request):
-    participant_email = request.session.get('participant_email')
-    if not participant_email:
-        return render(request, 'myapp/combined_history.html', {'combined_history': []})
-
-    try:
-        participant = Participant.objects.get(email=participant_email)
-    except Participant.DoesNotExist:
+    participant = request.participant
+    if not participant:
         return render(request, 'myapp/combined_history.html', {'combined_history': []})
 
-    registrations = CleanupRegistration.objects.filter(participant=participant).order_by('-registered_at')
-    combined_history_data = []
-    
-    for reg in registrations:
-        points_value = 0
-        points_status = "Pending"
-        
-        if reg.points_awarded:
-            points_status = "Awarded"
-            points_value = reg.event.points
-        
-        combined_history_data.append({
-            'event_name': reg.event.name,
-            'event_date': reg.event.date,
-            'event_time': reg.event.start_time,
-            'points': points_value,
-            'points_status': points_status,
-            'attended': reg.attended,
-            'registered_at': reg.registered_at,
-            'type': 'event'
-        })
+    cursor = request.GET.get('cursor')
+    page = combined_history_page(participant, cursor, COMBINED_HISTORY_PAGE_SIZE)
+    next_url = None
+    if page.next_cursor:
+        next_url = reverse('myapp:combined_history') + '?' + urlencode({'cursor': page.next_cursor})
 
-    total_points = participant.points
-    
     return render(request, 'myapp/combined_history.html', {
-        'combined_history': combined_history_data,
-        'total_points': total_points,
+        'combined_history': page.entries,
+        'next_url': next_url,
+        'is_continuation': bool(cursor),
+        'total_points': participant.points,
         'participant_points': participant.points
-    })
\ No newline at end of file
+    })
@@ -84,10 +84,13 @@ JAZZMIN_UI_TWEAKS = {
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'myapp.middleware.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'myapp.middleware.ParticipantMiddleware',
+    'myapp.middleware.AdminSessionTimeoutMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -136,6 +139,84 @@ else:
         }
     }
 
+# ============================================
+# CACHE
+# ============================================
+
+# Shared between gunicorn workers so invalidation in one worker is seen by all.
+# Point REDIS_URL at a Redis instance in production; the file cache is the fallback.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', str(BASE_DIR / '.django_cache')),
+        }
+    }
+
+# Event feed shared by select_event and event_list
+EVENT_FEED_PREVIOUS_LIMIT = 3
+EVENT_FEED_UPCOMING_LIMIT = 12  # the rest is paged with a keyset cursor
+EVENT_FEED_UPCOMING_DAYS = 365
+
+# Per-view latency/SQL metrics (myapp.metrics), summed across workers through the cache.
+# Lower the sample rate to measure only a fraction of requests; 0 turns measuring off.
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '1.0'))
+METRICS_FLUSH_INTERVAL = 10  # seconds between a worker's writes of its totals
+# Bearer token for Prometheus scraping /metrics/; staff can always view it.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Anonymous full-page cache for home, about and the public event pages (seconds).
+# Event saves drop the event pages at once; this only bounds how long unused pages linger.
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Staff are logged out of the admin pages after this many idle seconds. The activity
+# stamp in the session is only rewritten once it is ADMIN_ACTIVITY_GRANULARITY seconds old.
+ADMIN_SESSION_TIMEOUT = 300
+ADMIN_ACTIVITY_GRANULARITY = 60
+
+# Volunteer notification inbox (myapp.notifications): rows shown per page view, and how
+# long any notification is kept before the hourly prune job deletes it.
+NOTIFICATION_INBOX_LIMIT = 20
+NOTIFICATION_RETENTION_DAYS = 30
+
+# Per-process cache behind request.participant (seconds, rows)
+PARTICIPANT_CACHE_TIMEOUT = 30
+PARTICIPANT_CACHE_SIZE = 1024
+
+# Login/registration throttling: (max attempts, window in seconds), counted in the cache.
+LOGIN_THROTTLE_RATES = {'ip': (30, 600), 'identifier': (5, 600)}
+REGISTRATION_THROTTLE_RATE = (10, 3600)
+# Render puts one proxy in front of gunicorn; X-Forwarded-For is ignored when 0.
+THROTTLE_PROXY_COUNT = int(os.environ.get('THROTTLE_PROXY_COUNT', '0'))
+LOGIN_ATTEMPT_RETENTION_DAYS = 30
+
+# Background jobs (myapp.jobs), run by `manage.py run_worker` from the database.
+# JOBS_EAGER runs each job in the web process after commit, for development without a worker.
+JOBS_EAGER = os.environ.get('JOBS_EAGER', 'False').lower() == 'true'
+JOBS_WORKER_THREADS = 2
+JOBS_POLL_INTERVAL = 1.0
+JOBS_VISIBILITY_TIMEOUT = 300  # seconds before a running job is handed to another worker
+JOBS_RETRY_BACKOFF = 10  # seconds before the first retry, doubling after that
+JOBS_RETENTION_DAYS = 7
+
+# ============================================
+# AUTHENTICATION
+# ============================================
+
+# AccountBackend serves the shared volunteer/admin login form with a single hash;
+# ModelBackend keeps Django admin and admin_login working as before.
+AUTHENTICATION_BACKENDS = [
+    'myapp.backends.AccountBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 # ============================================
 # PASSWORD VALIDATION
 # ============================================
@@ -165,8 +246,11 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-# WhiteNoise configuration
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise configuration, plus AVIF/WebP width variants of the images below
+# for {% responsive_image %} (myapp.storage).
+STATICFILES_STORAGE = 'myapp.storage.ResponsiveStaticFilesStorage'
+RESPONSIVE_IMAGES = ('images/*.jpg', 'images/*.jpeg', 'images/*.png')
+RESPONSIVE_IMAGE_WIDTHS = (320, 640, 960, 1280)
 
 # ============================================
 # MEDIA FILES
@@ -175,6 +259,11 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Proof photos (myapp.proofs): upload cap and variant sizes in pixels
+PROOF_IMAGE_MAX_BYTES = 15 * 1024 * 1024
+PROOF_DISPLAY_SIZE = 1600
+PROOF_THUMBNAIL_SIZE = 320
+
 # ============================================
 # DEFAULT AUTO FIELD
 # ============================================